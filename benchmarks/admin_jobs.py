@@ -0,0 +1,100 @@
+"""Student logins while an admin imports a large roster and deletes a class.
+
+Runs the same scenario against two servers:
+
+  inline  JOBS_ENABLED=0: the import and delete run inside the admin request
+  jobs    the default: the request queues a background job and returns at once
+
+In both modes the work is committed in chunks. The comparison shows how
+long the admin waits for a response, how long the work takes end to end, and
+the worst per-round login p50/p99 while it runs. The imported class is the
+one deleted afterwards, so the seeded students' logins stay valid.
+
+Usage: python benchmarks/admin_jobs.py [--students 20000] [--import-rows 100000] [--concurrency 50]
+Needs httpx (pip install -r benchmarks/requirements.txt).
+"""
+import argparse, asyncio, json, os, sqlite3, sys, tempfile, time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from login_storm import free_port, make_plan, run_logins, seed_database, start_server
+
+MODES = {
+    "inline": {"JOBS_ENABLED": "0"},
+    "jobs": {"JOB_POLL_SECONDS": "0.2"},
+}
+
+
+async def admin_work(base_url, rows, class_name):
+    timings = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=600, headers={"Accept": "application/json"}) as admin:
+        await admin.post("/admin/login", data={"username": "admin", "password": "admin123"})
+        start = time.perf_counter()
+        jobs = []
+        for name, request in (
+            ("import", admin.post("/admin/upload_csv", files={"csv_file": ("roster.csv", rows)})),
+            ("delete_class", admin.post("/admin/delete_class", data={"class_name": class_name})),
+        ):
+            sent = time.perf_counter()
+            report = (await request).json()
+            timings[f"{name}_response_s"] = round(time.perf_counter() - sent, 3)
+            if "job_id" in report:
+                jobs.append(report["job_id"])
+        for job_id in jobs:
+            while (await admin.get(f"/admin/jobs/{job_id}")).json()["status"] in ("queued", "running"):
+                await asyncio.sleep(0.1)
+        timings["all_done_s"] = round(time.perf_counter() - start, 3)
+    return timings
+
+
+async def run_mode(args, base_url, rows, class_name):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        admin = asyncio.create_task(admin_work(base_url, rows, class_name))
+        logins = []
+        while not admin.done():
+            logins.append(await run_logins(client, make_plan(args, ["json"], 0.1)[:args.concurrency * 4],
+                                           args.concurrency))
+        result = await admin
+    latencies = [r for r in logins if r["requests"]]
+    result["logins"] = {
+        "rounds": len(latencies),
+        "requests": sum(r["requests"] for r in latencies),
+        "errors": sum(r["errors"] for r in latencies),
+        "p50_ms": max((r["p50_ms"] for r in latencies), default=None),
+        "p99_ms": max((r["p99_ms"] for r in latencies), default=None),
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--import-rows", type=int, default=100000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    args.requests = args.concurrency * 4
+
+    rows = "".join(f"Imported {i},IMP{i:07d},IMPORTED\n" for i in range(args.import_rows)).encode()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        seeded = os.path.join(tmp, "seeded.db")
+        seed_database(seeded, args.students, 6, 2)
+        for mode, env in MODES.items():
+            # Each mode starts from its own copy of the seeded database
+            db_file = os.path.join(tmp, f"{mode}.db")
+            with sqlite3.connect(seeded) as src, sqlite3.connect(db_file) as dst:
+                src.backup(dst)
+            port = free_port()
+            server = start_server(db_file, port, 1, env)
+            try:
+                results[mode] = asyncio.run(run_mode(args, f"http://127.0.0.1:{port}", rows, "IMPORTED"))
+            finally:
+                server.terminate()
+                server.wait()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Event-loop lag while students log in through the database (cache misses).
+
+Serves two source trees under uvicorn, one after the other, with the login
+cache and negative filter off so every login queries SQLite:
+
+  before  the revision before logins moved off the event loop (the async JSON
+          handler ran its sqlite3 lookup on the loop)
+  after   this tree (lookups run on the login thread pool)
+
+Each server also runs a lag monitor on its event loop: a task that sleeps
+10 ms and records how late it wakes up. Anything that holds the loop (a
+sqlite3 call made on it included) shows up as lag; work on other threads
+does not. A separate process fires concurrent cache-miss JSON logins, while
+this process takes an exclusive lock on the database for --lock-ms every
+second, standing in for a large commit, a checkpoint or a slow disk. Each
+pair runs twice:
+
+  wal       the default journal mode: readers don't wait for the lock
+  rollback  DB_JOURNAL_MODE=DELETE: every lookup waits (busy timeout) for it
+
+An indexed lookup that doesn't wait takes well under a millisecond, so on a
+small host the difference only shows when reads are slow; the rollback run
+makes them slow on purpose. The report has the loop lag at idle and under
+load and the logins' throughput and latency.
+
+Usage: python benchmarks/event_loop_lag.py [--students 20000] [--concurrency 100] [--requests 5000]
+       [--lock-ms 200] [--baseline-rev REV]   (default: parent of the commit that added LoginExecutor)
+Needs httpx (pip install -r benchmarks/requirements.txt) and git.
+"""
+import argparse, asyncio, json, os, random, sqlite3, subprocess, sys, tempfile, threading, time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from login_storm import ROOT, free_port, percentile, run_logins, seed_database
+
+SERVER_ENV = {"LOGIN_CACHE_ENABLED": "0", "NEGATIVE_FILTER_ENABLED": "0", "ADMISSION_ENABLED": "0",
+              "LOGIN_AUDIT_ENABLED": "0", "HTTP_CACHE_ENABLED": "0"}
+JOURNALS = {"wal": {}, "rollback": {"DB_JOURNAL_MODE": "DELETE"}}
+
+# Serves main:app from the current directory with a loop-lag monitor mounted
+SERVER = """
+import asyncio, os, sys, time
+sys.path.insert(0, os.getcwd())
+import main, uvicorn
+
+lags = []
+
+async def monitor():
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+async def start_monitor():
+    asyncio.get_running_loop().create_task(monitor())
+
+async def read_lag(reset: bool = False):
+    samples = lags[:]
+    if reset:
+        lags.clear()
+    return samples
+
+main.app.router.on_startup.append(start_monitor)
+main.app.add_api_route("/__lag", read_lag, methods=["GET"])
+uvicorn.run(main.app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+
+def default_baseline():
+    first = subprocess.run(["git", "log", "--reverse", "--format=%H", "-S", "class LoginExecutor", "--", "main.py"],
+                           cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()[0]
+    return first + "~1"
+
+
+def unpack_revision(rev, directory):
+    archive = subprocess.run(["git", "archive", rev, "main.py", "templates", "static"],
+                             cwd=ROOT, capture_output=True, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", directory], input=archive, check=True)
+
+
+def start_server(root, db_file, port, extra_env):
+    env = dict(os.environ, DB_FILE=db_file, **SERVER_ENV, **extra_env)
+    proc = subprocess.Popen([sys.executable, "-c", SERVER, str(port)], cwd=root, env=env)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/__lag", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("server did not start")
+
+
+def lag_summary(samples):
+    return {"samples": len(samples), "p50_ms": percentile(samples, 50), "p99_ms": percentile(samples, 99),
+            "max_ms": round(max(samples) * 1000, 3) if samples else None,
+            "total_s": round(sum(samples), 3)}
+
+
+async def load(args):
+    # Runs in its own process, so the client's work is not on the server's CPU time
+    plan = [("json", True, f"ADM{random.randrange(args.students):07d}") for _ in range(args.requests)]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        return await run_logins(client, plan, args.concurrency)
+
+
+def hold_lock(db_file, hold, stop):
+    conn = sqlite3.connect(db_file, isolation_level=None, timeout=30)
+    while not stop.wait(1 - hold):
+        conn.execute("BEGIN EXCLUSIVE")
+        time.sleep(hold)
+        conn.execute("COMMIT")
+    conn.close()
+
+
+def run_mode(args, root, db_file, journal_env):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(root, db_file, port, journal_env)
+    try:
+        httpx.get(f"{base_url}/__lag", params={"reset": "true"})
+        time.sleep(2)
+        idle = httpx.get(f"{base_url}/__lag", params={"reset": "true"}).json()
+        stop = threading.Event()
+        locker = threading.Thread(target=hold_lock, args=(db_file, args.lock_ms / 1000, stop))
+        locker.start()
+        try:
+            generator = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--load", "--base-url", base_url,
+                 "--students", str(args.students), "--concurrency", str(args.concurrency),
+                 "--requests", str(args.requests)],
+                capture_output=True, text=True, check=True,
+            )
+        finally:
+            stop.set()
+            locker.join()
+        busy = httpx.get(f"{base_url}/__lag", params={"reset": "true"}).json()
+    finally:
+        server.terminate()
+        server.wait()
+    return {"loop_lag_idle": lag_summary(idle), "loop_lag_under_load": lag_summary(busy),
+            "logins": json.loads(generator.stdout)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--lock-ms", type=int, default=200)
+    parser.add_argument("--baseline-rev")
+    parser.add_argument("--load", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.load:
+        print(json.dumps(asyncio.run(load(args))))
+        return
+
+    baseline = args.baseline_rev or default_baseline()
+    results = {"baseline_rev": baseline}
+    with tempfile.TemporaryDirectory() as tmp:
+        seeded = os.path.join(tmp, "seeded.db")
+        seed_database(seeded, args.students, 6, 1)
+        before_root = os.path.join(tmp, "before")
+        os.makedirs(before_root)
+        unpack_revision(baseline, before_root)
+        for journal, journal_env in JOURNALS.items():
+            for mode, root in (("before", before_root), ("after", ROOT)):
+                db_file = os.path.join(tmp, f"{journal}-{mode}.db")
+                with sqlite3.connect(seeded) as src, sqlite3.connect(db_file) as dst:
+                    src.backup(dst)
+                results.setdefault(journal, {})[mode] = run_mode(args, root, db_file, journal_env)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
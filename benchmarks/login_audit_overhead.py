@@ -0,0 +1,69 @@
+"""Login latency with the write-behind audit log off vs on.
+
+Seeds a temporary database, then for each mode starts uvicorn, fires the same
+valid/invalid login mix at /login and /student_login, stops the server and
+counts the rows in login_events. With the log on, every login must have been
+written by the time the server has shut down (the writer flushes on exit).
+
+  off   LOGIN_AUDIT_ENABLED=0
+  on    the default batch size and flush interval
+
+Usage: python benchmarks/login_audit_overhead.py [--students 20000] [--concurrency 100] [--requests 5000]
+Needs httpx (pip install -r benchmarks/requirements.txt).
+"""
+import argparse, asyncio, json, os, sqlite3, sys, tempfile
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from login_storm import free_port, make_plan, run_logins, seed_database, start_server
+
+MODES = {
+    "off": {"LOGIN_AUDIT_ENABLED": "0"},
+    "on": {},
+}
+
+
+async def run_mode(args, base_url, plan):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await run_logins(client, plan[:200], 20)  # warm-up
+        return await run_logins(client, plan, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--invalid-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    plan = make_plan(args, ["form", "json"], args.invalid_ratio)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "school.db")
+        seed_database(db_file, args.students, 6, 2)
+        for mode, env in MODES.items():
+            port = free_port()
+            server = start_server(db_file, port, 1, env)
+            try:
+                results[mode] = asyncio.run(run_mode(args, f"http://127.0.0.1:{port}", plan))
+            finally:
+                server.terminate()
+                server.wait()
+            conn = sqlite3.connect(db_file)
+            results[mode]["events_written"] = conn.execute("SELECT COUNT(*) FROM login_events").fetchone()[0]
+            conn.execute("DELETE FROM login_events")
+            conn.commit()
+            conn.close()
+
+    on, off = results["on"], results["off"]
+    results["overhead_ms"] = {p: round(on[p] - off[p], 3) for p in ("p50_ms", "p95_ms", "p99_ms")}
+    results["all_logins_recorded"] = on["events_written"] == on["requests"] + 200
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results["all_logins_recorded"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Login page and logo delivery with HTTP caching off vs on.
+
+Starts uvicorn twice (HTTP_CACHE_ENABLED=0, then the default) and simulates
+an exam start: every device loads the login page and its logo, then reloads
+the page once. Reports latency, throughput and bytes on the wire for each
+step, so both the CPU saved per request and the bandwidth saved on a shared
+school connection show up.
+
+  first_visit_page  GET /                  (Accept-Encoding: br, gzip)
+  first_visit_logo  GET the logo URL       found in the page
+  reload_page       GET / again            with If-None-Match from the first visit
+
+Usage: python benchmarks/login_page_cache.py [--devices 2000] [--concurrency 100]
+Needs httpx (pip install -r benchmarks/requirements.txt).
+"""
+import argparse, asyncio, json, os, re, sys, tempfile, time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from login_storm import free_port, percentile, seed_database, start_server
+
+MODES = {
+    "off": {"HTTP_CACHE_ENABLED": "0"},
+    "on": {},
+}
+
+
+async def fetch_all(client, requests, concurrency):
+    latencies, statuses, wire_bytes = [], {}, 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal wire_bytes
+        for url, headers in queue:
+            start = time.perf_counter()
+            async with client.stream("GET", url, headers=headers) as response:
+                async for chunk in response.aiter_raw():
+                    wire_bytes += len(chunk)
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "wire_bytes": wire_bytes,
+    }
+
+
+async def exam_start(args, base_url):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    accept = {"Accept-Encoding": "br, gzip"}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        first = await client.get("/", headers=accept)
+        logo = re.search(r'<img src="([^"]+)"', first.text).group(1)
+        etag = first.headers.get("etag")
+        revalidate = dict(accept, **({"If-None-Match": etag} if etag else {}))
+        return {
+            "logo_url": logo,
+            "first_visit_page": await fetch_all(client, [("/", accept)] * args.devices, args.concurrency),
+            "first_visit_logo": await fetch_all(client, [(logo, accept)] * args.devices, args.concurrency),
+            "reload_page": await fetch_all(client, [("/", revalidate)] * args.devices, args.concurrency),
+            "logo_cache_control": (await client.get(logo)).headers.get("cache-control"),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "school.db")
+        seed_database(db_file, 100, 1, 1)
+        for mode, env in MODES.items():
+            port = free_port()
+            server = start_server(db_file, port, 1, env)
+            try:
+                results[mode] = asyncio.run(exam_start(args, f"http://127.0.0.1:{port}"))
+            finally:
+                server.terminate()
+                server.wait()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Exam-start "thundering herd" benchmark.
+
+Seeds a throwaway school.db, starts the app under uvicorn exactly as
+render.yaml does, and then fires logins at it:
+
+  form_valid / form_invalid    POST /login           (valid / unknown admission numbers)
+  json_valid / json_invalid    POST /student_login   (valid / unknown admission numbers)
+  mixed_with_admin             valid+invalid logins on both routes while an admin
+                               loops set_active_link and upload_csv
+
+Each scenario reports p50/p95/p99 latency, throughput and error rate. The full
+result is printed as JSON and, with --output, written to a file so runs from
+different versions can be diffed.
+
+Usage: python benchmarks/login_storm.py [--students 20000] [--concurrency 200] [--requests 5000]
+Needs httpx (pip install -r benchmarks/requirements.txt).
+"""
+import argparse, asyncio, json, os, random, socket, subprocess, sys, tempfile, time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EXPECTED_STATUS = {
+    ("form", True): 302,
+    ("form", False): 200,
+    ("json", True): 200,
+    ("json", False): 401,
+}
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000, 3)
+
+
+def seed_database(db_file, students, classes, links_per_class):
+    os.environ["DB_FILE"] = db_file
+    sys.path.insert(0, ROOT)
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        import main
+    finally:
+        os.chdir(cwd)
+    conn = main.get_db_connection()
+    class_names = [f"CLASS{c}" for c in range(classes)]
+    conn.executemany(
+        "INSERT OR IGNORE INTO students (name, admission_number, class_name) VALUES (?, ?, ?)",
+        ((f"Student {i}", f"ADM{i:07d}", class_names[i % classes]) for i in range(students)),
+    )
+    conn.executemany(
+        "INSERT INTO links (name, url, class_name, is_active) VALUES (?, ?, ?, ?)",
+        ((f"{c} exam {n}", f"https://forms.example/{c}/{n}", c, 1 if n == 0 else 0)
+         for c in class_names for n in range(links_per_class)),
+    )
+    conn.commit()
+    links = {}
+    for r in conn.execute("SELECT id, class_name FROM links ORDER BY id"):
+        links.setdefault(r["class_name"], []).append(r["id"])
+    conn.close()
+    return links
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_file, port, workers, extra_env):
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "warning"]
+    if workers > 1:
+        cmd += ["--workers", str(workers)]
+    env = dict(os.environ, DB_FILE=db_file, **extra_env)
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("server did not start")
+
+
+def login_request(client, route, admission_number):
+    if route == "form":
+        return client.post("/login", data={"username": admission_number})
+    return client.post("/student_login", json={"admission_number": admission_number})
+
+
+async def run_logins(client, plan, concurrency):
+    latencies, errors, statuses = [], 0, {}
+    queue = iter(plan)
+
+    async def worker():
+        nonlocal errors
+        for route, valid, admission_number in queue:
+            start = time.perf_counter()
+            try:
+                response = await login_request(client, route, admission_number)
+                status = response.status_code
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status != EXPECTED_STATUS[(route, valid)]:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0,
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+async def admin_loop(base_url, links, stop):
+    # Alternates set_active_link and a small CSV import until the logins finish
+    latencies, errors, batch = [], 0, 0
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as admin:
+        await admin.post("/admin/login", data={"username": "admin", "password": "admin123"})
+        while not stop.is_set():
+            class_name = random.choice(list(links))
+            start = time.perf_counter()
+            try:
+                r = await admin.post("/admin/set_active_link",
+                                     data={"link_id": str(random.choice(links[class_name])), "class_name": class_name})
+                ok = r.status_code == 303
+                rows = "".join(f"Bench {batch}-{i},BENCH{batch:05d}{i:04d},{class_name}\n" for i in range(500))
+                r = await admin.post("/admin/upload_csv", files={"csv_file": ("bench.csv", rows.encode())})
+                ok = ok and r.status_code == 303
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+            batch += 1
+    return {
+        "operations": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def make_plan(args, routes, invalid_ratio):
+    plan = []
+    for _ in range(args.requests):
+        valid = random.random() >= invalid_ratio
+        number = f"ADM{random.randrange(args.students):07d}" if valid else f"BAD{random.randrange(10 ** 7):07d}"
+        plan.append((random.choice(routes), valid, number))
+    return plan
+
+
+async def run_scenarios(args, base_url, links):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        await run_logins(client, make_plan(args, ["json"], 0)[:200], 20)  # warm-up
+        for name, routes, invalid_ratio in (
+            ("form_valid", ["form"], 0.0),
+            ("form_invalid", ["form"], 1.0),
+            ("json_valid", ["json"], 0.0),
+            ("json_invalid", ["json"], 1.0),
+        ):
+            results[name] = await run_logins(client, make_plan(args, routes, invalid_ratio), args.concurrency)
+
+        stop = asyncio.Event()
+        admin_task = asyncio.create_task(admin_loop(base_url, links, stop))
+        results["mixed_with_admin"] = await run_logins(
+            client, make_plan(args, ["form", "json"], args.invalid_ratio), args.concurrency
+        )
+        stop.set()
+        results["mixed_with_admin"]["admin"] = await admin_task
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--classes", type=int, default=12)
+    parser.add_argument("--links-per-class", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000, help="requests per scenario")
+    parser.add_argument("--invalid-ratio", type=float, default=0.3, help="share of unknown numbers in the mixed run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn --workers")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--db", help="database file to seed (default: a temporary school.db)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the server, e.g. --env LOGIN_CACHE_ENABLED=0")
+    parser.add_argument("--output", help="write the JSON result to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.abspath(args.db or os.path.join(tmp, "school.db"))
+        extra_env = dict(item.split("=", 1) for item in args.env)
+        links = seed_database(db_file, args.students, args.classes, args.links_per_class)
+        port = free_port()
+        server = start_server(db_file, port, args.workers, extra_env)
+        try:
+            scenarios = asyncio.run(run_scenarios(args, f"http://127.0.0.1:{port}", links))
+        finally:
+            server.terminate()
+            server.wait()
+
+    result = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "db")},
+        "scenarios": scenarios,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
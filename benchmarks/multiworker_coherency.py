@@ -0,0 +1,82 @@
+"""Check that an admin change made through one worker reaches logins on the others.
+
+Starts `uvicorn main:app --workers N` on a seeded temporary database, logs in as
+admin (the session cookie must be accepted by whichever worker serves the next
+request), switches a class's active link and then polls /student_login over
+fresh connections, which the kernel spreads across the workers. Exits non-zero
+if any login still sees the old link after --bound seconds.
+
+Usage: python benchmarks/multiworker_coherency.py [--workers 4] [--bound 3]
+Needs httpx (pip install -r benchmarks/requirements.txt).
+"""
+import argparse, json, os, sys, tempfile, time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from login_storm import free_port, seed_database, start_server
+
+
+def check(args, base_url, links):
+    class_name = sorted(links)[0]
+    old_url = f"https://forms.example/{class_name}/0"
+    new_url = f"https://forms.example/{class_name}/1"
+    student = "ADM0000000"  # seed_database puts student 0 in the first class
+
+    def logins(n):
+        seen = []
+        for _ in range(n):
+            with httpx.Client(base_url=base_url, timeout=10) as client:
+                url = client.post("/student_login", json={"admission_number": student}).json().get("form_link")
+            seen.append((time.perf_counter(), url))
+        return seen
+
+    # Warm every worker's cache with the old link first
+    assert {url for _, url in logins(args.probes)} == {old_url}, "workers disagree before the change"
+
+    # No keep-alive, so consecutive admin requests land on different workers
+    no_keepalive = httpx.Limits(max_keepalive_connections=0)
+    with httpx.Client(base_url=base_url, timeout=10, limits=no_keepalive) as admin:
+        admin.post("/admin/login", data={"username": "admin", "password": "admin123"})
+        for _ in range(args.probes):
+            assert admin.get("/admin/dashboard", follow_redirects=False).status_code == 200, \
+                "admin session rejected by a worker"
+        changed_at = time.perf_counter()
+        r = admin.post("/admin/set_active_link", data={"link_id": str(links[class_name][1]), "class_name": class_name})
+        assert r.status_code == 303
+
+    # Staleness is measured up to the last login that still saw the old link
+    last_stale, deadline = 0.0, changed_at + args.bound + 10
+    while time.perf_counter() < deadline:
+        seen = logins(args.probes)
+        stale = [at for at, url in seen if url != new_url]
+        if not stale:
+            break
+        last_stale = max(stale) - changed_at
+    return {"converged": last_stale <= args.bound, "stale_for_seconds": round(last_stale, 3), "bound": args.bound}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--probes", type=int, default=40, help="logins per polling round")
+    parser.add_argument("--bound", type=float, default=3.0, help="seconds allowed for all workers to converge")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "school.db")
+        links = seed_database(db_file, args.students, 3, 2)
+        port = free_port()
+        server = start_server(db_file, port, args.workers, {})
+        try:
+            result = check(args, f"http://127.0.0.1:{port}", links)
+        finally:
+            server.terminate()
+            server.wait()
+    print(json.dumps(result))
+    sys.exit(0 if result["converged"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Memory footprint and false-positive rate of the negative-lookup Bloom filter.
+
+Builds the filter the way StudentFilter.rebuild sizes it for rosters of 1k to
+1M admission numbers, then probes it with numbers that are not on the roster.
+For comparison it also reports what a plain Python set of the same numbers
+costs.
+
+Usage: python benchmarks/negative_filter.py [--probes 200000]
+"""
+import argparse, json, os, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def set_bytes(numbers):
+    members = set(numbers)
+    return sys.getsizeof(members) + sum(sys.getsizeof(n) for n in members)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--probes", type=int, default=200000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DB_FILE"] = os.path.join(tmp, "school.db")
+    os.chdir(tmp)
+    sys.path.insert(0, ROOT)
+    from main import BloomFilter
+
+    results = []
+    for n in (int(x) for x in args.sizes.split(",")):
+        numbers = [f"ADM{i:08d}" for i in range(n)]
+        start = time.perf_counter()
+        bloom = BloomFilter(max(1000, int(n * 1.25) + 1000))
+        for number in numbers:
+            bloom.add(number)
+        build = time.perf_counter() - start
+
+        probes = [f"BAD{i:08d}" for i in range(args.probes)]
+        start = time.perf_counter()
+        false_positives = sum(1 for p in probes if p in bloom)
+        lookup = (time.perf_counter() - start) / len(probes)
+
+        results.append({
+            "roster": n,
+            "filter_bytes": len(bloom.bits),
+            "bits_per_entry": round(bloom.size / n, 2),
+            "hashes": bloom.hashes,
+            "false_positive_rate": round(false_positives / len(probes), 5),
+            "build_s": round(build, 3),
+            "lookup_us": round(lookup * 1e6, 2),
+            "python_set_bytes": set_bytes(numbers),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Login latency with a concurrent admin write: per-request connections vs the pool.
+
+Runs the same workload twice in fresh subprocesses:
+
+  before  DB_POOL_ENABLED=0, DB_JOURNAL_MODE=DELETE  (the old get_db_connection)
+  after   pooled connections with the default WAL/pragma settings
+
+Usage: python benchmarks/pool_latency.py [--students 20000] [--threads 16] [--logins 500]
+"""
+import argparse, json, os, random, subprocess, sys, tempfile, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "before": {"DB_POOL_ENABLED": "0", "DB_JOURNAL_MODE": "DELETE"},
+    "after": {},
+}
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def worker(args):
+    sys.path.insert(0, ROOT)
+    import main
+
+    conn = main.get_db_connection()
+    conn.executemany(
+        "INSERT INTO students (name, admission_number, class_name) VALUES (?, ?, ?)",
+        ((f"Student {i}", f"ADM{i:07d}", f"JSS{i % 3 + 1}") for i in range(args.students)),
+    )
+    conn.executemany(
+        "INSERT INTO links (name, url, class_name, is_active) VALUES (?, ?, ?, 1)",
+        ((f"Exam {c}", f"https://forms.example/{c}", f"JSS{c}") for c in range(1, 4)),
+    )
+    conn.commit()
+    conn.close()
+
+    stop = threading.Event()
+    writes = []
+
+    def admin_writer():
+        # A roster import followed by an active-link switch, over and over
+        while not stop.is_set():
+            start = time.perf_counter()
+            conn = main.get_db_connection()
+            conn.executemany(
+                "INSERT INTO students (name, admission_number, class_name) VALUES (?, ?, ?)",
+                ((f"Tmp {i}", f"TMP{i:07d}", "JSS1") for i in range(5000)),
+            )
+            conn.execute("UPDATE links SET is_active = 0 WHERE class_name = ?", ("JSS1",))
+            conn.execute("UPDATE links SET is_active = 1 WHERE class_name = ?", ("JSS1",))
+            conn.commit()
+            conn.execute("DELETE FROM students WHERE admission_number LIKE 'TMP%'")
+            conn.commit()
+            conn.close()
+            writes.append(time.perf_counter() - start)
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def login_worker():
+        local, failed = [], 0
+        for _ in range(args.logins):
+            adm = f"ADM{random.randrange(args.students):07d}"
+            start = time.perf_counter()
+            try:
+                main.resolve_student_login(adm)
+            except Exception:
+                failed += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    writer = threading.Thread(target=admin_writer)
+    writer.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=login_worker) for _ in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    writer.join()
+
+    print(json.dumps({
+        "logins": len(latencies),
+        "errors": sum(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "admin_writes": len(writes),
+    }))
+
+
+def run(args):
+    results = {}
+    for mode, env in MODES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            proc_env = dict(os.environ, LOGIN_CACHE_ENABLED="0", DB_FILE=os.path.join(tmp, "school.db"), **env)
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker",
+                 "--students", str(args.students), "--threads", str(args.threads), "--logins", str(args.logins)],
+                cwd=tmp, env=proc_env, capture_output=True, text=True, check=True,
+            )
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--worker", action="store_true")
+    args = parser.parse_args()
+    worker(args) if args.worker else run(args)
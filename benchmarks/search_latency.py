@@ -0,0 +1,76 @@
+"""Latency of /admin/search's queries on a large students table.
+
+Seeds a temporary database with --students rows of generated names, then times
+search_students() for admission-number prefixes and name substrings and prints
+the query plans, which should show index/FTS lookups and no table scans.
+
+Usage: python benchmarks/search_latency.py [--students 500000]
+"""
+import argparse, json, os, random, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST = ["Adebayo", "Chinedu", "Ngozi", "Aisha", "Tunde", "Funmilayo", "Emeka", "Zainab", "Ifeoma", "Musa",
+         "Bola", "Kelechi", "Yetunde", "Ibrahim", "Amaka", "Segun", "Halima", "Obinna", "Temitope", "Uche"]
+LAST = ["Okonkwo", "Adeyemi", "Bello", "Eze", "Ogunleye", "Abubakar", "Nwosu", "Balogun", "Okafor", "Lawal",
+        "Olawale", "Chukwu", "Danjuma", "Afolabi", "Onyeka", "Salami", "Ibekwe", "Adebisi", "Garba", "Ojo"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DB_FILE"] = os.path.join(tmp, "school.db")
+    os.environ["LOGIN_CACHE_ENABLED"] = os.environ["NEGATIVE_FILTER_ENABLED"] = "0"
+    os.chdir(tmp)
+    sys.path.insert(0, ROOT)
+    import main as app
+
+    rng = random.Random(1)
+    conn = app.get_db_connection()
+    start = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO students (name, admission_number, class_name) VALUES (?, ?, ?)",
+        ((f"{rng.choice(FIRST)} {rng.choice(LAST)} {i}", f"ADM{i:07d}", f"JSS{i % 3 + 1}")
+         for i in range(args.students)),
+    )
+    conn.commit()
+    seed_s = time.perf_counter() - start
+
+    workloads = {
+        "admission_prefix": [f"ADM{rng.randrange(args.students):07d}"[:rng.randint(5, 10)] for _ in range(args.queries)],
+        "name_substring": [rng.choice(FIRST + LAST)[1:rng.randint(4, 6)] for _ in range(args.queries)],
+        "name_and_number": [f"{rng.choice(LAST)[-3:]} {rng.randrange(args.students)}" for _ in range(args.queries)],
+        "no_match": [f"zzq{i}" for i in range(args.queries)],
+    }
+    report = {"students": args.students, "seed_s": round(seed_s, 1), "workloads": {}}
+    for name, queries in workloads.items():
+        timings = []
+        for q in queries:
+            t = time.perf_counter()
+            app.search_students(conn, q, 20)
+            timings.append(time.perf_counter() - t)
+        timings.sort()
+        report["workloads"][name] = {
+            "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+            "p99_ms": round(timings[int(len(timings) * 0.99)] * 1000, 3),
+            "max_ms": round(timings[-1] * 1000, 3),
+        }
+
+    plans = {
+        "admission_prefix": ("SELECT name FROM students WHERE admission_number >= ? AND admission_number < ? "
+                             "ORDER BY admission_number LIMIT 20", ["ADM1", "ADM1\U0010ffff"]),
+        "name_substring": ("SELECT s.name FROM students_fts JOIN students s ON s.id = students_fts.rowid "
+                           "WHERE students_fts MATCH ? LIMIT 20", ['"bay"']),
+    }
+    report["plans"] = {name: [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+                       for name, (sql, params) in plans.items()}
+    conn.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
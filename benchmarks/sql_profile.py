@@ -0,0 +1,110 @@
+"""Profile every SQL statement the app runs and report the slow paths.
+
+Seeds a temporary database, imports main with SQL_PROFILE set and drives the
+app in-process through a typical exam day: student logins (with the login
+cache off, so the database path is exercised), the admin dashboard with
+paging and filters, search, CSV import/sync, exports, link switching and bulk
+class operations. The report lists each distinct statement with its calls,
+timings, callers and EXPLAIN QUERY PLAN, and flags table scans, temp B-trees
+and COUNT(*) over a subquery.
+
+With --baseline, exits non-zero when a statement picks up a flag it did not
+have in the baseline report, so plan regressions fail before deploy:
+
+  python benchmarks/sql_profile.py --output sql-profile.json          # on main
+  python benchmarks/sql_profile.py --baseline sql-profile.json        # on the branch
+
+Any other run can be profiled too, e.g. SQL_PROFILE=1 python benchmarks/login_storm.py
+writes one sql-profile-<pid>.json per process.
+Needs httpx (pip install -r benchmarks/requirements.txt).
+"""
+import argparse, atexit, json, os, sys, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from login_storm import ROOT, seed_database
+
+
+def exercise(main, args, links):
+    from fastapi.testclient import TestClient
+
+    classes = sorted(links)
+    with TestClient(main.app, raise_server_exceptions=False) as client:
+        for i in range(0, args.students, max(1, args.students // 200)):
+            client.post("/student_login", json={"admission_number": f"ADM{i:07d}"})
+            client.post("/login", data={"username": f"ADM{i:07d}"}, follow_redirects=False)
+            client.post("/student_login", json={"admission_number": f"BAD{i:07d}"})
+
+        client.post("/admin/login", data={"username": "admin", "password": "admin123"})
+        client.get("/admin/dashboard")
+        client.get("/admin/dashboard", params={"class_name": classes[0]})
+        client.get("/admin/dashboard", params={"class_name": classes[0], "page": 5})
+        dashboard = client.get("/admin/dashboard", params={"class_name": classes[0], "after": 100})
+        client.get("/admin/dashboard", params={"class_name": classes[0], "before": 500})
+        assert dashboard.status_code == 200
+        for q in ("Student 12", "ADM00001", "tudent 9"):
+            client.get("/admin/search", params={"q": q})
+            client.get("/admin/search", params={"q": q, "class_name": classes[1]})
+        client.get("/admin/cache_stats")
+
+        rows = "".join(f"Profile {i},PROF{i:06d},{classes[0]}\n" for i in range(500))
+        client.post("/admin/upload_csv", files={"csv_file": ("p.csv", rows.encode())})
+        client.post("/admin/upload_csv", files={"csv_file": ("p.csv", rows.encode())},
+                    data={"mode": "sync", "dry_run": "true"})
+        client.post("/admin/add_student", data={"name": "One Off", "admission_number": "ONE1", "class_name": classes[1]})
+        client.post("/admin/delete_student", data={"admission_number": "ONE1"})
+        client.post("/admin/upload_link", data={"name": "Mock", "link": "https://forms.example/mock", "class_name": classes[1]})
+        client.post("/admin/set_active_link", data={"link_id": str(links[classes[1]][-1]), "class_name": classes[1]})
+        client.post("/admin/delete_students", data={"admission_numbers": [f"PROF{i:06d}" for i in range(50)]})
+        client.post("/admin/rename_class", data={"from_class": classes[-1], "to_class": "RENAMED"})
+        client.post("/admin/delete_class", data={"class_name": "RENAMED"})
+
+        for path in ("/admin/export/students", "/admin/export/links", "/admin/export/attendance", "/admin/export/logins"):
+            client.get(path).read()
+        client.get("/metrics")
+
+
+def regressions(report, baseline):
+    before = {e["sql"]: set(e["flags"]) for e in baseline["statements"]}
+    found = []
+    for e in report["statements"]:
+        new_flags = set(e["flags"]) - before.get(e["sql"], set())
+        if new_flags:
+            found.append({"sql": e["sql"], "callers": e["callers"], "new_flags": sorted(new_flags)})
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--classes", type=int, default=6)
+    parser.add_argument("--output", default="sql-profile.json")
+    parser.add_argument("--baseline", help="earlier report; fail on statements with new flags")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(SQL_PROFILE=output, LOGIN_CACHE_ENABLED="0")
+        links = seed_database(os.path.join(tmp, "school.db"), args.students, args.classes, 2)
+        import main as app_main
+        app_main.init_db()  # seeded is_active flags -> active_links
+        app_main.rebuild_student_filter()  # the filter was built before the rows were seeded
+        app_main.sql_profiler.reset()  # leave the seeding out of the report
+        cwd = os.getcwd()
+        os.chdir(ROOT)
+        try:
+            exercise(app_main, args, links)
+        finally:
+            os.chdir(cwd)
+        app_main.sql_profiler.write(output)
+        report = app_main.sql_profiler.report()
+        atexit.unregister(app_main.sql_profiler.write)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f))
+        print(json.dumps({"regressions": found}, indent=2))
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
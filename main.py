@@ -1,39 +1,541 @@
-from fastapi import FastAPI, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse, PlainTextResponse, JSONResponse
+from fastapi import FastAPI, Request, Form, UploadFile, File, Query
+from fastapi.responses import HTMLResponse, RedirectResponse, PlainTextResponse, JSONResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from fastapi.exceptions import RequestValidationError
-import sqlite3, csv, os
-from io import StringIO
+from starlette.concurrency import run_in_threadpool
+import sqlite3, csv, os, sys, threading, time, io, asyncio, bisect, secrets, collections, math, gzip, zlib, re, queue, datetime
+import hashlib, mimetypes, itertools, json, atexit, shutil
+from typing import List
+from starlette.datastructures import Headers
+import anyio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, quote
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are served without it
+    brotli = None
 
 # ---------------------------------------------
 # APP INITIALIZATION
 # ---------------------------------------------
 app = FastAPI()
-app.add_middleware(SessionMiddleware, secret_key="super-secret-session-key")
 
-os.makedirs("static", exist_ok=True)
-os.makedirs("templates", exist_ok=True)
+# Relative to this file, so main can be imported from any working directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+os.makedirs(STATIC_DIR, exist_ok=True)
+os.makedirs(TEMPLATES_DIR, exist_ok=True)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
-DB_FILE = "school.db"
+DB_FILE = os.environ.get("DB_FILE", "school.db")
 ADMIN_USERNAME = "admin"
 ADMIN_PASSWORD = "admin123"
 
 # ---------------------------------------------
-# DATABASE INITIALIZATION
+# HTTP CACHING (precompressed assets, ETags, fingerprinted static URLs)
 # ---------------------------------------------
-def get_db_connection():
-    conn = sqlite3.connect(DB_FILE)
+# Static files and the student login page are held in memory with gzip/brotli
+# variants built once at startup. Templates link static files through
+# static_url(), which adds a content hash to the name; hashed URLs are served
+# as immutable, everything else must revalidate with If-None-Match.
+HTTP_CACHE_ENABLED = os.environ.get("HTTP_CACHE_ENABLED", "1") != "0"
+IMMUTABLE = "public, max-age=31536000, immutable"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+COMPRESS_MIN_BYTES = 512
+
+class Asset:
+    def __init__(self, body, media_type):
+        self.media_type = media_type
+        digest = hashlib.sha256(body).hexdigest()
+        self.fingerprint = digest[:10]
+        self.variants = {"identity": body}
+        if media_type.startswith(COMPRESSIBLE_TYPES) and len(body) >= COMPRESS_MIN_BYTES:
+            self.variants["gzip"] = gzip.compress(body, 9, mtime=0)
+            if brotli:
+                self.variants["br"] = brotli.compress(body, quality=11)
+        self.etags = {enc: f'"{digest[:16]}-{enc}"' for enc in self.variants}
+
+    def negotiate(self, accept_encoding):
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            coding, _, params = part.partition(";")
+            if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                accepted.add(coding.strip())
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return "identity"
+
+    def response(self, request_headers, cache_control, status_code=200):
+        encoding = self.negotiate(request_headers.get("accept-encoding", ""))
+        headers = {"ETag": self.etags[encoding], "Cache-Control": cache_control}
+        if len(self.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and status_code == 200:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in tags or self.etags[encoding] in tags:
+                return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(self.variants[encoding], status_code=status_code, media_type=self.media_type, headers=headers)
+
+class StaticAssets:
+    FINGERPRINTED = re.compile(r"^(.+)\.([0-9a-f]{10})(\.[^./]+)$")
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.assets = {}
+
+    def load(self):
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                full_path = os.path.join(root, filename)
+                path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    body = f.read()
+                media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                if media_type.startswith("text/"):
+                    media_type += "; charset=utf-8"
+                self.assets[path] = Asset(body, media_type)
+
+    def url(self, path):
+        asset = self.assets.get(path) if HTTP_CACHE_ENABLED else None
+        if not asset:
+            return f"/static/{path}"
+        stem, ext = os.path.splitext(path)
+        return f"/static/{stem}.{asset.fingerprint}{ext}"
+
+    def resolve(self, path):
+        # Returns (asset, immutable); an outdated hash still gets the current file
+        if path in self.assets:
+            return self.assets[path], False
+        match = self.FINGERPRINTED.match(path)
+        if match:
+            asset = self.assets.get(match.group(1) + match.group(3))
+            if asset:
+                return asset, asset.fingerprint == match.group(2)
+        return None, False
+
+class CachedStaticFiles(StaticFiles):
+    # Files on disk that were not loaded at startup fall through to StaticFiles
+    async def get_response(self, path, scope):
+        asset, immutable = static_assets.resolve(path)
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+        return asset.response(Headers(scope=scope), IMMUTABLE if immutable else "no-cache")
+
+static_assets = StaticAssets(STATIC_DIR)
+templates.env.globals["static_url"] = static_assets.url
+if HTTP_CACHE_ENABLED:
+    static_assets.load()
+    app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
+else:
+    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+
+# ---------------------------------------------
+# ADMISSION CONTROL (load shedding for student logins)
+# ---------------------------------------------
+ADMISSION_ENABLED = os.environ.get("ADMISSION_ENABLED", "1") != "0"
+ADMISSION_QUEUE_TIMEOUT_MS = int(os.environ.get("ADMISSION_QUEUE_TIMEOUT_MS", "2000"))
+ADMISSION_RETRY_AFTER = os.environ.get("ADMISSION_RETRY_AFTER", "2")
+
+class AdmissionController:
+    # Caps in-flight requests for one route. Up to max_queue callers wait (FIFO)
+    # for a slot for at most queue_timeout seconds; everyone else is shed.
+    def __init__(self, max_inflight, max_queue, queue_timeout):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.waiters = collections.deque()
+        self.admitted = 0
+        self.shed = 0
+
+    async def acquire(self):
+        if self.inflight < self.max_inflight and not self.waiters:
+            self.inflight += 1
+            self.admitted += 1
+            return True
+        if len(self.waiters) >= self.max_queue:
+            self.shed += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # The client went away: leave the queue, or pass on a slot that
+            # release() already handed over, so it is not leaked
+            if waiter.done():
+                self.release()
+            else:
+                waiter.cancel()
+                self.waiters.remove(waiter)
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            self.waiters.remove(waiter)
+            self.shed += 1
+            return False
+        self.admitted += 1
+        return True
+
+    def release(self):
+        # Hand the slot straight to the oldest waiter so inflight never overshoots
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.inflight -= 1
+
+def admission_limits(prefix, inflight, queue):
+    return AdmissionController(
+        int(os.environ.get(f"{prefix}_MAX_INFLIGHT", inflight)),
+        int(os.environ.get(f"{prefix}_MAX_QUEUE", queue)),
+        ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+    )
+
+admission_controllers = {
+    "/login": admission_limits("ADMISSION_LOGIN", 64, 256),
+    "/student_login": admission_limits("ADMISSION_STUDENT_LOGIN", 64, 256),
+}
+
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        controller = admission_controllers.get(scope["path"]) if scope["type"] == "http" else None
+        if not ADMISSION_ENABLED or controller is None or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+        if not await controller.acquire():
+            headers = {"Retry-After": ADMISSION_RETRY_AFTER}
+            if scope["path"] == "/student_login":
+                response = JSONResponse({"detail": "Server busy, please try again."}, status_code=503, headers=headers)
+            else:
+                response = PlainTextResponse("Server busy, please try again.", status_code=503, headers=headers)
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
+
+app.add_middleware(AdmissionMiddleware)
+
+# ---------------------------------------------
+# METRICS (Prometheus text format on /metrics)
+# ---------------------------------------------
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "0"))  # 0 = don't log slow queries
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}          # (route, method, status) -> count
+        self.request_latency = {}   # route -> Histogram
+        self.query_latency = {}     # statement kind -> Histogram
+        self.query_errors = {}      # error message -> count
+        self.slow_queries = 0
+
+    def observe_request(self, route, method, status, seconds):
+        with self.lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.request_latency.setdefault(route, Histogram()).observe(seconds)
+
+    def observe_query(self, sql, seconds, error=None):
+        kind = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "OTHER"
+        with self.lock:
+            self.query_latency.setdefault(kind, Histogram()).observe(seconds)
+            if error:
+                self.query_errors[error] = self.query_errors.get(error, 0) + 1
+            if SLOW_QUERY_MS and seconds * 1000 >= SLOW_QUERY_MS:
+                self.slow_queries += 1
+                print(f"🐢 Slow query ({seconds * 1000:.1f} ms): {' '.join(sql.split())}")
+
+    def render(self, samples):
+        lines = ["# TYPE http_requests_total counter"]
+        with self.lock:
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+            lines.append("# TYPE http_request_duration_seconds histogram")
+            for route, hist in sorted(self.request_latency.items()):
+                lines += hist.render("http_request_duration_seconds", f'route="{route}"')
+            lines.append("# TYPE db_query_duration_seconds histogram")
+            for kind, hist in sorted(self.query_latency.items()):
+                lines += hist.render("db_query_duration_seconds", f'statement="{kind}"')
+            lines.append("# TYPE db_query_errors_total counter")
+            for error, count in sorted(self.query_errors.items()):
+                label = error.replace("\\", "/").replace('"', "'")
+                lines.append(f'db_query_errors_total{{error="{label}"}} {count}')
+            lines.append("# TYPE db_slow_queries_total counter")
+            lines.append(f"db_slow_queries_total {self.slow_queries}")
+        typed = set()
+        for name, kind, value in samples:
+            base = name.split("{")[0]
+            if base not in typed:
+                typed.add(base)
+                lines.append(f"# TYPE {base} {kind}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+def is_metered_route(path):
+    return path in ("/login", "/student_login") or path.startswith("/admin/")
+
+class MetricsMiddleware:
+    # Plain ASGI middleware so timing covers the handler, template rendering and
+    # the threadpool wait without BaseHTTPMiddleware's extra task per request.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED or not is_metered_route(scope["path"]):
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            label = route.path if route else scope["path"] if scope["path"] in admission_controllers else "unmatched"
+            metrics.observe_request(label, scope["method"], status,
+                                    time.perf_counter() - start)
+
+app.add_middleware(MetricsMiddleware)
+
+# ---------------------------------------------
+# SQL PROFILING (SQL_PROFILE=1 or SQL_PROFILE=<report path>)
+# ---------------------------------------------
+# Records every distinct statement with its timings, callers and EXPLAIN QUERY
+# PLAN, and flags table scans, temp B-trees and COUNT(*) over a subquery. The
+# JSON report is written when the process exits; "{pid}" in the path keeps
+# workers from overwriting each other. Off by default: EXPLAIN runs once per
+# new statement and every call walks the stack.
+SQL_PROFILE = os.environ.get("SQL_PROFILE", "")
+SQL_PROFILE_DEFAULT_REPORT = "sql-profile-{pid}.json"
+EXPLAINABLE = re.compile(r"\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b", re.I)
+COUNT_SUBQUERY = re.compile(r"COUNT\(\*\)\s+FROM\s*\(", re.I)
+TABLE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\S+)")
+# Scans of these are expected and cheap: the schema and a row per cached table
+SQL_PROFILE_SMALL_TABLES = {"sqlite_master", "sqlite_schema", "cache_versions"}
+
+class SqlProfiler:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.statements = {}
+
+    def reset(self):
+        with self.lock:
+            self.statements = {}
+
+    def record(self, conn, sql, params, seconds, error=None):
+        key = " ".join(sql.split())
+        frame = sys._getframe(1)
+        while frame.f_code.co_name in ("timed", "execute", "executemany", "commit"):
+            frame = frame.f_back
+        with self.lock:
+            entry = self.statements.get(key)
+            explain = entry is None
+            if explain:
+                entry = self.statements[key] = {"sql": key, "calls": 0, "errors": 0, "total_ms": 0.0,
+                                                "max_ms": 0.0, "callers": set(), "plan": None, "flags": []}
+            entry["calls"] += 1
+            entry["errors"] += error is not None
+            entry["total_ms"] += seconds * 1000
+            entry["max_ms"] = max(entry["max_ms"], seconds * 1000)
+            entry["callers"].add(frame.f_code.co_name)
+        if explain:
+            plan, flags = self.explain(conn, key, params)
+            with self.lock:
+                entry["plan"], entry["flags"] = plan, flags
+
+    def explain(self, conn, sql, params):
+        # Plans are captured once, with the parameters of the first call
+        flags = ["COUNT(*) over a subquery"] if COUNT_SUBQUERY.search(sql) else []
+        if not EXPLAINABLE.match(sql):
+            return None, flags
+        try:
+            rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        except sqlite3.Error as exc:
+            return [f"EXPLAIN failed: {exc}"], flags
+        depth, plan, scans, bare_scans = {0: -1}, [], [], 0
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            plan.append("  " * depth[node] + detail)
+            scan = TABLE_SCAN.match(detail)
+            if (scan and " USING " not in detail and "VIRTUAL TABLE" not in detail
+                    and scan.group(1) not in SQL_PROFILE_SMALL_TABLES):
+                scans.append(f"full scan of {scan.group(1)}")
+                bare_scans += scan.group(0) == detail
+            if "USE TEMP B-TREE" in detail:
+                flags.append(detail.lower().replace("use temp b-tree", "temp B-tree"))
+        # The keyset pager's first page (a bare SCAN in rowid order with no WHERE
+        # or OFFSET) stops at LIMIT and reads only a page; other scans are flagged.
+        first_page = (bare_scans == len(scans) == 1 and not flags
+                      and re.search(r"\bLIMIT\b", sql, re.I) and not re.search(r"\b(WHERE|OFFSET)\b", sql, re.I))
+        if not first_page:
+            flags += scans
+        return plan, flags
+
+    def report(self):
+        with self.lock:
+            statements = [dict(e, callers=sorted(e["callers"]), total_ms=round(e["total_ms"], 3),
+                               avg_ms=round(e["total_ms"] / e["calls"], 3), max_ms=round(e["max_ms"], 3))
+                          for e in self.statements.values()]
+        statements.sort(key=lambda e: e["total_ms"], reverse=True)
+        return {
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "database": DB_FILE,
+            "sqlite_version": sqlite3.sqlite_version,
+            "summary": {
+                "statements": len(statements),
+                "executions": sum(e["calls"] for e in statements),
+                "total_ms": round(sum(e["total_ms"] for e in statements), 3),
+                "flagged": sum(1 for e in statements if e["flags"]),
+            },
+            "statements": statements,
+        }
+
+    def write(self, path=None):
+        path = (path or self.path).replace("{pid}", str(os.getpid()))
+        report = self.report()
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        summary = report["summary"]
+        print(f"🔎 SQL profile: {summary['statements']} statements, {summary['executions']} executions, "
+              f"{summary['flagged']} flagged -> {path}")
+        for e in report["statements"]:
+            if e["flags"]:
+                print(f"   ⚠️  {e['total_ms']:.1f} ms / {e['calls']} calls [{', '.join(e['callers'])}] "
+                      f"{'; '.join(e['flags'])}: {e['sql'][:120]}")
+        return path
+
+sql_profiler = None
+if SQL_PROFILE and SQL_PROFILE != "0":
+    sql_profiler = SqlProfiler(SQL_PROFILE_DEFAULT_REPORT if SQL_PROFILE == "1" else SQL_PROFILE)
+    atexit.register(sql_profiler.write)
+
+# ---------------------------------------------
+# DATABASE CONNECTIONS (per-thread pool)
+# ---------------------------------------------
+DB_POOL_ENABLED = os.environ.get("DB_POOL_ENABLED", "1") != "0"
+DB_JOURNAL_MODE = os.environ.get("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.environ.get("DB_SYNCHRONOUS", "NORMAL")
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_MMAP_SIZE = int(os.environ.get("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+DB_CACHE_SIZE = int(os.environ.get("DB_CACHE_SIZE", "-16000"))  # negative = KiB
+
+class TimedConnection(sqlite3.Connection):
+    # Times each execute/executemany/commit into the db_query_duration histogram
+    # and, when profiling, the SQL profile. Lock waits show up here too, since
+    # the busy timeout is spent inside them.
+    def timed(self, label, call, *args, sample=()):
+        if not METRICS_ENABLED and not sql_profiler:
+            return call(self, *args)
+        start, error = time.perf_counter(), None
+        try:
+            return call(self, *args)
+        except sqlite3.Error as exc:
+            error = str(exc)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            if METRICS_ENABLED:
+                metrics.observe_query(label, seconds, error)
+            if sql_profiler:
+                sql_profiler.record(self, label, sample, seconds, error)
+
+    def execute(self, sql, params=()):
+        return self.timed(sql, sqlite3.Connection.execute, sql, params, sample=params)
+
+    def executemany(self, sql, seq_of_params):
+        if sql_profiler:
+            # Peek at the first row so EXPLAIN has parameters, without draining a generator
+            rows = iter(seq_of_params)
+            first = next(rows, None)
+            if first is not None:
+                return self.timed(sql, sqlite3.Connection.executemany, sql, itertools.chain([first], rows),
+                                  sample=first)
+            seq_of_params = ()
+        return self.timed(sql, sqlite3.Connection.executemany, sql, seq_of_params)
+
+    def commit(self):
+        return self.timed("COMMIT", sqlite3.Connection.commit)
+
+class PooledConnection(TimedConnection):
+    # Handlers call close() when done; a pooled connection stays open for the
+    # next request on the same thread and only drops any unfinished transaction.
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def close_for_real(self):
+        sqlite3.Connection.close(self)
+
+_db_pool = threading.local()
+
+def open_db_connection(factory=TimedConnection, **kwargs):
+    conn = sqlite3.connect(DB_FILE, timeout=DB_BUSY_TIMEOUT_MS / 1000, factory=factory, **kwargs)
     conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = {DB_CACHE_SIZE}")
+    return conn
+
+def get_db_connection():
+    if not DB_POOL_ENABLED:
+        return open_db_connection()
+    conn = getattr(_db_pool, "conn", None)
+    if conn is None:
+        conn = _db_pool.conn = open_db_connection(PooledConnection)
     return conn
 
+# ---------------------------------------------
+# DATABASE INITIALIZATION
+# ---------------------------------------------
 def init_db():
     conn = get_db_connection()
+    conn.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
     c = conn.cursor()
     c.execute("""
         CREATE TABLE IF NOT EXISTS students (
@@ -52,39 +554,709 @@ def init_db():
             is_active INTEGER DEFAULT 0
         )
     """)
+    # Indexes are created with IF NOT EXISTS so existing databases pick them up on start
+    c.execute("CREATE INDEX IF NOT EXISTS idx_students_class ON students (class_name, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_links_class ON links (class_name, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_links_active ON links (class_name, is_active)")
+    # One row per class pointing at its active link; links.is_active mirrors it for display
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS active_links (
+            class_name TEXT PRIMARY KEY,
+            link_id INTEGER NOT NULL,
+            url TEXT NOT NULL
+        )
+    """)
+    # Migrate classes that only have the old is_active flag, then drop duplicate flags
+    c.execute("""
+        INSERT OR IGNORE INTO active_links (class_name, link_id, url)
+        SELECT class_name, id, url FROM links
+        WHERE id IN (SELECT MIN(id) FROM links WHERE is_active = 1 GROUP BY class_name)
+    """)
+    c.execute("""
+        UPDATE links SET is_active = (id IN (SELECT link_id FROM active_links))
+        WHERE is_active != (id IN (SELECT link_id FROM active_links))
+    """)
+    # Shared state for worker processes: settings holds the session secret,
+    # cache_versions is bumped by every write that affects the login cache
+    c.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    c.execute("CREATE TABLE IF NOT EXISTS cache_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+    c.execute("INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('students', 0), ('active_links', 0)")
+    c.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('session_secret', ?)", (secrets.token_urlsafe(32),))
+    # Student login audit trail, written in batches by LoginAuditLog (times are UTC)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS login_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admission_number TEXT NOT NULL,
+            class_name TEXT,
+            url TEXT,
+            outcome TEXT NOT NULL,
+            logged_at TEXT NOT NULL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_login_events_time ON login_events (logged_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_login_events_student ON login_events (admission_number, logged_at)")
+    # Background admin jobs; the table is also the queue, so jobs survive a restart
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            params TEXT NOT NULL,
+            status TEXT NOT NULL,
+            progress INTEGER NOT NULL DEFAULT 0,
+            total INTEGER,
+            state TEXT NOT NULL DEFAULT '{}',
+            result TEXT,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            heartbeat_at REAL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
     conn.commit()
     conn.close()
+    init_class_summary()
+    init_search_index()
 
+def init_class_summary():
+    # Per-class student/link counts maintained by triggers, so the dashboard
+    # never has to count or DISTINCT the big tables.
+    # Runs under one write lock so workers starting together (or writing while
+    # another starts) can't count a class twice.
+    conn = get_db_connection()
+    conn.executescript("""
+        BEGIN IMMEDIATE;
+        CREATE TABLE IF NOT EXISTS class_summary (
+            class_name TEXT PRIMARY KEY,
+            student_count INTEGER NOT NULL DEFAULT 0,
+            link_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TRIGGER IF NOT EXISTS class_summary_student_insert AFTER INSERT ON students BEGIN
+            INSERT INTO class_summary (class_name, student_count) VALUES (new.class_name, 1)
+            ON CONFLICT (class_name) DO UPDATE SET student_count = student_count + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS class_summary_student_delete AFTER DELETE ON students BEGIN
+            UPDATE class_summary SET student_count = student_count - 1 WHERE class_name = old.class_name;
+        END;
+        CREATE TRIGGER IF NOT EXISTS class_summary_student_move AFTER UPDATE OF class_name ON students
+        WHEN old.class_name != new.class_name BEGIN
+            UPDATE class_summary SET student_count = student_count - 1 WHERE class_name = old.class_name;
+            INSERT INTO class_summary (class_name, student_count) VALUES (new.class_name, 1)
+            ON CONFLICT (class_name) DO UPDATE SET student_count = student_count + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS class_summary_link_insert AFTER INSERT ON links BEGIN
+            INSERT INTO class_summary (class_name, link_count) VALUES (new.class_name, 1)
+            ON CONFLICT (class_name) DO UPDATE SET link_count = link_count + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS class_summary_link_delete AFTER DELETE ON links BEGIN
+            UPDATE class_summary SET link_count = link_count - 1 WHERE class_name = old.class_name;
+        END;
+        CREATE TRIGGER IF NOT EXISTS class_summary_link_move AFTER UPDATE OF class_name ON links
+        WHEN old.class_name != new.class_name BEGIN
+            UPDATE class_summary SET link_count = link_count - 1 WHERE class_name = old.class_name;
+            INSERT INTO class_summary (class_name, link_count) VALUES (new.class_name, 1)
+            ON CONFLICT (class_name) DO UPDATE SET link_count = link_count + 1;
+        END;
+        -- Existing databases: count what is already there. Once the triggers
+        -- exist, an empty summary means empty tables, so this is a no-op after
+        -- the first run.
+        INSERT INTO class_summary (class_name, student_count, link_count)
+        SELECT class_name, SUM(students), SUM(links) FROM (
+            SELECT class_name, COUNT(*) AS students, 0 AS links FROM students GROUP BY class_name
+            UNION ALL
+            SELECT class_name, 0, COUNT(*) FROM links GROUP BY class_name
+        ) WHERE NOT EXISTS (SELECT 1 FROM class_summary) GROUP BY class_name;
+        COMMIT;
+    """)
+    conn.close()
+
+def load_class_summary(conn):
+    # The whole dashboard header in one read: every non-empty class with its
+    # counts and active link.
+    return conn.execute("""
+        SELECT cs.class_name, cs.student_count, cs.link_count,
+               al.link_id AS active_link_id, al.url AS active_url, l.name AS active_name
+        FROM class_summary cs
+        LEFT JOIN active_links al ON al.class_name = cs.class_name
+        LEFT JOIN links l ON l.id = al.link_id
+        WHERE cs.student_count > 0 OR cs.link_count > 0
+        ORDER BY cs.class_name
+    """).fetchall()
+
+def init_search_index():
+    # Trigram FTS5 index over student names, kept in sync by triggers. SQLite
+    # builds without FTS5/trigram (< 3.34) only get admission-number search.
+    global SEARCH_FTS_ENABLED
+    conn = get_db_connection()
+    try:
+        created = not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'students_fts'"
+        ).fetchone()
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5("
+            "name, content='students', content_rowid='id', tokenize='trigram')"
+        )
+    except sqlite3.OperationalError as exc:
+        print(f"⚠️ Name search disabled: {exc}")
+        SEARCH_FTS_ENABLED = False
+        conn.close()
+        return
+    conn.executescript("""
+        CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts (rowid, name) VALUES (new.id, new.name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF name ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO students_fts (rowid, name) VALUES (new.id, new.name);
+        END;
+    """)
+    if created:
+        # Existing databases: index the students that are already there
+        conn.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+    conn.commit()
+    conn.close()
+
+SEARCH_FTS_ENABLED = True
 init_db()
 
+def bump_cache_version(conn, name):
+    # Call inside the write's transaction; returns the new version for note_version()
+    conn.execute("UPDATE cache_versions SET version = version + 1 WHERE name = ?", (name,))
+    return conn.execute("SELECT version FROM cache_versions WHERE name = ?", (name,)).fetchone()[0]
+
 # ---------------------------------------------
-# STUDENT LOGIN
+# SESSIONS (signed cookies, same key in every worker)
 # ---------------------------------------------
-@app.get("/", response_class=HTMLResponse)
-def student_login(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+def load_session_secret():
+    conn = get_db_connection()
+    secret = conn.execute("SELECT value FROM settings WHERE key = 'session_secret'").fetchone()["value"]
+    conn.close()
+    return secret
 
-@app.post("/login")
-def handle_student_login(request: Request, username: str = Form(...)):
+SESSION_SECRET = os.environ.get("SESSION_SECRET") or load_session_secret()
+app.add_middleware(SessionMiddleware, secret_key=SESSION_SECRET)
+
+# ---------------------------------------------
+# LOGIN CACHE (admission_number -> class_name -> active url)
+# ---------------------------------------------
+LOGIN_CACHE_ENABLED = os.environ.get("LOGIN_CACHE_ENABLED", "1") != "0"
+
+class LoginCache:
+    # Resident copy of the two login lookups. Warmed at startup, updated by the
+    # admin write endpoints and read-through on a miss. Unknown admission
+    # numbers are not cached. Rows written outside the app (e.g. the sqlite3
+    # shell) are not seen until the process restarts, or until the writer also
+    # runs UPDATE cache_versions SET version = version + 1 WHERE name = 'students'
+    # (or 'active_links'): until then the negative filter rejects new students.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.students = {}
+        self.active_links = {}
+        self.generation = 0
+        self.versions = {}
+        self.students_deferred = False
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, conn, tables=("students", "active_links")):
+        # Versions are read before the rows, so a concurrent write can only make
+        # them look older than the data and trigger one more reload later.
+        versions = {r["name"]: r["version"] for r in conn.execute("SELECT name, version FROM cache_versions")}
+        if not LOGIN_CACHE_ENABLED:
+            # Still track versions: the negative filter relies on them
+            with self.lock:
+                self.versions.update((name, versions[name]) for name in tables)
+                self.students_deferred = self.students_deferred and "students" not in tables
+            return
+        if "students" in tables:
+            students = {r["admission_number"]: r["class_name"] for r in conn.execute(
+                "SELECT admission_number, class_name FROM students"
+            )}
+        if "active_links" in tables:
+            active_links = {r["class_name"]: r["url"] for r in conn.execute(
+                "SELECT class_name, url FROM active_links"
+            )}
+        with self.lock:
+            if "students" in tables:
+                self.students = students
+                self.students_deferred = False
+            if "active_links" in tables:
+                self.active_links = active_links
+            for name in tables:
+                self.versions[name] = versions[name]
+            self.generation += 1
+
+    def note_version(self, name, version):
+        # Our own write produced `version`; skip the reload unless another worker
+        # also wrote in between.
+        with self.lock:
+            if self.versions.get(name) == version - 1:
+                self.versions[name] = version
+
+    def stale_tables(self, conn):
+        versions = {r["name"]: r["version"] for r in conn.execute("SELECT name, version FROM cache_versions")}
+        return tuple(name for name, version in versions.items() if self.versions.get(name) != version)
+
+    def defer_students(self):
+        # Another worker is still writing students; ask the database until the
+        # reload that follows its last batch.
+        with self.lock:
+            self.students_deferred = True
+
+    def lookup(self, admission_number):
+        # Returns (found, class_name, url) or None when the database must be asked.
+        if self.students_deferred:
+            self.misses += 1
+            return None
+        class_name = self.students.get(admission_number)
+        if class_name is None or class_name not in self.active_links:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return True, class_name, self.active_links[class_name]
+
+    def store(self, generation, admission_number, class_name, url):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.students[admission_number] = class_name
+            self.active_links[class_name] = url
+
+    def set_student(self, admission_number, class_name):
+        with self.lock:
+            self.students[admission_number] = class_name
+            self.generation += 1
+
+    def remove_student(self, admission_number):
+        with self.lock:
+            self.students.pop(admission_number, None)
+            self.generation += 1
+
+    def clear_students(self):
+        with self.lock:
+            self.students = {}
+            self.generation += 1
+
+    def set_active_link(self, class_name, url):
+        with self.lock:
+            self.active_links[class_name] = url
+            self.generation += 1
+
+    def stats(self):
+        return {
+            "enabled": LOGIN_CACHE_ENABLED,
+            "students": len(self.students),
+            "classes": len(self.active_links),
+            "hits": self.hits,
+            "misses": self.misses,
+            "students_deferred": self.students_deferred,
+            "versions": dict(self.versions),
+        }
+
+login_cache = LoginCache()
+
+def warm_login_cache():
+    conn = get_db_connection()
+    login_cache.load(conn)
+    conn.close()
+
+warm_login_cache()
+
+# ---------------------------------------------
+# NEGATIVE LOOKUP FILTER (Bloom filter over admission numbers)
+# ---------------------------------------------
+# Rejects admission numbers that are definitely not in students without a
+# database query. Deleted students stay in the filter until the next rebuild;
+# that only costs a query, never a wrong answer. Students inserted outside the
+# app are rejected until a cache_versions bump or a restart (see LoginCache).
+NEGATIVE_FILTER_ENABLED = os.environ.get("NEGATIVE_FILTER_ENABLED", "1") != "0"
+NEGATIVE_FILTER_FP_RATE = float(os.environ.get("NEGATIVE_FILTER_FP_RATE", "0.01"))
+
+class BloomFilter:
+    def __init__(self, capacity, fp_rate=NEGATIVE_FILTER_FP_RATE):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key):
+        # Double hashing over the two halves of the per-process string hash
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        bits = self.bits
+        for p in self.positions(key):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self.positions(key))
+
+class StudentFilter:
+    # Adds happen before the inserting transaction commits, so a login can never
+    # see a committed student that the filter does not know about yet.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rebuild_lock = threading.Lock()
+        self.bloom = BloomFilter(1000)
+        self.pending = None
+        self.deferred = False  # stale until the next rebuild: reject nothing
+        self.rejected = 0
+
+    def rebuild(self, conn):
+        with self.rebuild_lock:
+            with self.lock:
+                self.pending = []
+            numbers = [r[0] for r in conn.execute("SELECT admission_number FROM students")]
+            bloom = BloomFilter(max(1000, int(len(numbers) * 1.25) + 1000))
+            for number in numbers:
+                bloom.add(number)
+            with self.lock:
+                for number in self.pending:
+                    bloom.add(number)
+                self.bloom, self.pending, self.deferred = bloom, None, False
+
+    def add(self, admission_number):
+        with self.lock:
+            self.bloom.add(admission_number)
+            if self.pending is not None:
+                self.pending.append(admission_number)
+
+    def over_capacity(self):
+        return self.bloom.count > self.bloom.capacity
+
+    def rejects(self, admission_number):
+        if not NEGATIVE_FILTER_ENABLED or self.deferred or admission_number in self.bloom:
+            return False
+        self.rejected += 1
+        return True
+
+    def stats(self):
+        bloom = self.bloom
+        return {
+            "enabled": NEGATIVE_FILTER_ENABLED,
+            "entries": bloom.count,
+            "capacity": bloom.capacity,
+            "bytes": len(bloom.bits),
+            "hashes": bloom.hashes,
+            "rejected": self.rejected,
+            "deferred": self.deferred,
+        }
+
+student_filter = StudentFilter()
+
+def rebuild_student_filter():
+    conn = get_db_connection()
+    student_filter.rebuild(conn)
+    conn.close()
+
+if NEGATIVE_FILTER_ENABLED:
+    rebuild_student_filter()
+
+# ---------------------------------------------
+# CROSS-WORKER CACHE SYNC
+# ---------------------------------------------
+# With `uvicorn --workers N` every process has its own login cache. A daemon
+# thread polls PRAGMA data_version, which only changes when another connection
+# commits, and reloads just the tables whose cache_versions row moved.
+# A bulk import or sync in another worker bumps the students version every
+# batch. Rather than reload students and rebuild the filter after each one,
+# both are bypassed (logins ask the database) until the version holds still
+# for a whole poll, and then reloaded once.
+CACHE_SYNC_INTERVAL_MS = int(os.environ.get("CACHE_SYNC_INTERVAL_MS", "1000"))
+
+def sync_login_cache_forever():
+    conn = open_db_connection()
+    last_data_version = pending_students = None
+    while True:
+        time.sleep(CACHE_SYNC_INTERVAL_MS / 1000)
+        try:
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == last_data_version and pending_students is None:
+                continue
+            last_data_version = data_version
+            stale = login_cache.stale_tables(conn)
+            if "students" in stale:
+                version = conn.execute("SELECT version FROM cache_versions WHERE name = 'students'").fetchone()[0]
+                if version != pending_students:
+                    pending_students = version
+                    login_cache.defer_students()
+                    student_filter.deferred = True
+                    stale = tuple(name for name in stale if name != "students")
+                else:
+                    pending_students = None
+            if stale:
+                login_cache.load(conn, stale)
+            if "students" in stale and NEGATIVE_FILTER_ENABLED:
+                student_filter.rebuild(conn)
+        except sqlite3.Error as exc:
+            last_data_version = None  # try again next poll
+            print(f"🔥 Cache sync error: {exc}")
+
+cache_sync_thread = None
+
+@app.on_event("startup")
+def start_cache_sync():
+    # The thread outlives shutdown; a restarted app keeps the one it has
+    global cache_sync_thread
+    if cache_sync_thread is not None and cache_sync_thread.is_alive():
+        return
+    if (LOGIN_CACHE_ENABLED or NEGATIVE_FILTER_ENABLED) and CACHE_SYNC_INTERVAL_MS > 0:
+        cache_sync_thread = threading.Thread(target=sync_login_cache_forever, name="cache-sync", daemon=True)
+        cache_sync_thread.start()
+
+def lookup_student_login(admission_number):
+    # Database half of the login lookup; fills the cache on the way out.
+    generation = login_cache.generation
     conn = get_db_connection()
-    student = conn.execute("SELECT * FROM students WHERE admission_number = ?", (username,)).fetchone()
+    student = conn.execute(
+        "SELECT class_name FROM students WHERE admission_number = ?", (admission_number,)
+    ).fetchone()
     active_link = None
     if student:
         active_link = conn.execute(
-            "SELECT url FROM links WHERE class_name = ? AND is_active = 1 LIMIT 1",
-            (student["class_name"],)
+            "SELECT url FROM active_links WHERE class_name = ?", (student["class_name"],)
         ).fetchone()
     conn.close()
 
-    if student:
-        if active_link:
-            return RedirectResponse(url=active_link["url"], status_code=302)
+    if not student:
+        return False, None
+    url = active_link["url"] if active_link else None
+    if LOGIN_CACHE_ENABLED:
+        login_cache.store(generation, admission_number, student["class_name"], url)
+    return True, url
+
+def resolve_student_login(admission_number):
+    # Returns (found, url): found is False for an unknown admission number,
+    # url is None when the student's class has no active link.
+    if LOGIN_CACHE_ENABLED:
+        cached = login_cache.lookup(admission_number)
+        if cached:
+            return True, cached[2]
+    if student_filter.rejects(admission_number):
+        return False, None
+    return lookup_student_login(admission_number)
+
+# ---------------------------------------------
+# LOGIN DB EXECUTOR (keeps sqlite3 off the event loop)
+# ---------------------------------------------
+LOGIN_DB_WORKERS = int(os.environ.get("LOGIN_DB_WORKERS", "8"))
+LOGIN_DB_QUEUE = int(os.environ.get("LOGIN_DB_QUEUE", "256"))
+
+class LoginExecutor:
+    # Dedicated thread pool for login lookups, separate from Starlette's shared
+    # threadpool. At most workers + queue_limit lookups are outstanding; further
+    # callers wait on the semaphore instead of piling work into the pool.
+    def __init__(self, workers, queue_limit):
+        self.workers = workers
+        self.executor = None
+        self.capacity = workers + queue_limit
+        self.semaphore = None
+        self.loop = None
+        self.waiting = 0
+        self.running = 0
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop, self.semaphore = loop, asyncio.Semaphore(self.capacity)
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            if self.executor is None:
+                # First login, or the first after a shutdown/startup cycle
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="login-db")
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self.running -= 1
+            self.semaphore.release()
+
+    def shutdown(self):
+        executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def queued(self):
+        executor = self.executor
+        return executor._work_queue.qsize() if executor else 0
+
+login_executor = LoginExecutor(LOGIN_DB_WORKERS, LOGIN_DB_QUEUE)
+
+async def resolve_student_login_async(admission_number):
+    # Cache hits are answered on the event loop; only misses go to a thread.
+    if LOGIN_CACHE_ENABLED:
+        cached = login_cache.lookup(admission_number)
+        if cached:
+            return True, cached[2]
+    if student_filter.rejects(admission_number):
+        return False, None
+    return await login_executor.run(lookup_student_login, admission_number)
+
+@app.on_event("shutdown")
+def shutdown_login_executor():
+    login_executor.shutdown()
+
+# ---------------------------------------------
+# LOGIN AUDIT LOG (write-behind)
+# ---------------------------------------------
+# Logins only append to an in-memory queue; a writer thread drains it into
+# login_events in one transaction per batch, so the hot path never waits on
+# the SQLite write lock. When the queue is full new events are dropped and
+# counted rather than blocking logins.
+LOGIN_AUDIT_ENABLED = os.environ.get("LOGIN_AUDIT_ENABLED", "1") != "0"
+LOGIN_AUDIT_BATCH = int(os.environ.get("LOGIN_AUDIT_BATCH", "500"))
+LOGIN_AUDIT_FLUSH_MS = int(os.environ.get("LOGIN_AUDIT_FLUSH_MS", "1000"))
+LOGIN_AUDIT_QUEUE = int(os.environ.get("LOGIN_AUDIT_QUEUE", "50000"))
+LOGIN_AUDIT_RETRIES = 3  # each attempt waits up to DB_BUSY_TIMEOUT_MS for the write lock
+LOGIN_AUDIT_MAX_ADMISSION_CHARS = 64  # queued entries hold whatever the client typed
+
+class LoginAuditLog:
+    def __init__(self, batch_size, flush_ms, max_queued):
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.thread = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def record(self, admission_number, found, url):
+        outcome = "invalid" if not found else "redirected" if url else "no_link"
+        try:
+            self.queue.put_nowait((str(admission_number)[:LOGIN_AUDIT_MAX_ADMISSION_CHARS], url, outcome, time.time()))
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="login-audit", daemon=True)
+            self.thread.start()
+
+    def close(self):
+        # Wakes the writer, which flushes everything queued before it exits
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        conn = open_db_connection()
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self.queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(self.queue.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    stopping = True
+                    batch = [e for e in batch if e is not None]
+                    while True:
+                        try:
+                            event = self.queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if event is not None:
+                            batch.append(event)
+                if batch:
+                    self.write(conn, batch)
+        finally:
+            conn.close()
+
+    def write(self, conn, batch):
+        # The class is looked up at flush time, a moment after the login itself
+        rows = [(adm, adm, url, outcome, datetime.datetime.fromtimestamp(at, datetime.timezone.utc)
+                 .strftime("%Y-%m-%d %H:%M:%S")) for adm, url, outcome, at in batch]
+        for attempt in range(LOGIN_AUDIT_RETRIES + 1):
+            try:
+                conn.executemany("""
+                    INSERT INTO login_events (admission_number, class_name, url, outcome, logged_at)
+                    VALUES (?, (SELECT class_name FROM students WHERE admission_number = ?), ?, ?, ?)
+                """, rows)
+                conn.commit()
+                self.written += len(rows)
+                return
+            except sqlite3.Error as exc:
+                conn.rollback()
+                # A long bulk write can outlast the busy timeout; the batch is retried, not lost
+                if isinstance(exc, sqlite3.OperationalError) and attempt < LOGIN_AUDIT_RETRIES:
+                    continue
+                self.failed += len(rows)
+                print(f"🔥 Login audit write failed, {len(rows)} events lost: {exc}")
+                return
+
+    def stats(self):
+        return {"queued": self.queue.qsize(), "written": self.written,
+                "dropped": self.dropped, "failed": self.failed}
+
+login_audit = LoginAuditLog(LOGIN_AUDIT_BATCH, LOGIN_AUDIT_FLUSH_MS, LOGIN_AUDIT_QUEUE)
+
+def record_login(admission_number, found, url):
+    if LOGIN_AUDIT_ENABLED:
+        login_audit.record(admission_number, found, url)
+
+@app.on_event("startup")
+def start_login_audit():
+    if LOGIN_AUDIT_ENABLED:
+        login_audit.start()
+
+@app.on_event("shutdown")
+def shutdown_login_audit():
+    login_audit.close()
+
+# ---------------------------------------------
+# STUDENT LOGIN
+# ---------------------------------------------
+LOGIN_INVALID_MSG = "Invalid Admission Number."
+
+# The login page is the same for every student, so with HTTP caching on it is
+# rendered once per message and served from memory.
+login_pages = {}
+if HTTP_CACHE_ENABLED:
+    for msg in ("", LOGIN_INVALID_MSG):
+        html = templates.get_template("login.html").render(msg=msg)
+        login_pages[msg] = Asset(html.encode("utf-8"), "text/html; charset=utf-8")
+
+@app.get("/", response_class=HTMLResponse)
+async def student_login(request: Request):
+    if HTTP_CACHE_ENABLED:
+        return login_pages[""].response(request.headers, "no-cache")
+    return templates.TemplateResponse("login.html", {"request": request})
+
+@app.post("/login")
+async def handle_student_login(request: Request, username: str = Form(...)):
+    found, url = await resolve_student_login_async(username)
+    record_login(username, found, url)
+
+    if found:
+        if url:
+            return RedirectResponse(url=url, status_code=302)
         return templates.TemplateResponse(
             "student_dashboard.html",
             {"request": request, "msg": "No active form link set."}
         )
+    if HTTP_CACHE_ENABLED:
+        return login_pages[LOGIN_INVALID_MSG].response(request.headers, "no-store")
     return templates.TemplateResponse(
-        "login.html", {"request": request, "msg": "Invalid Admission Number."}
+        "login.html", {"request": request, "msg": LOGIN_INVALID_MSG}
     )
 
 # ---------------------------------------------
@@ -109,92 +1281,388 @@ def admin_logout(request: Request):
 # ---------------------------------------------
 # ADMIN DASHBOARD (CLASS FILTER + PAGINATION)
 # ---------------------------------------------
+def keyset_page(conn, table, where, params, per_page, after=None, before=None, offset=0):
+    # One page of `table` ordered by id. `after`/`before` are id cursors; without
+    # them the page starts at `offset` (legacy page-number URLs).
+    clauses, args = list(where), list(params)
+    order = "ASC"
+    if after is not None:
+        clauses.append("id > ?")
+        args.append(after)
+    elif before is not None:
+        clauses.append("id < ?")
+        args.append(before)
+        order = "DESC"
+    condition = " WHERE " + " AND ".join(clauses) if clauses else ""
+    query = f"SELECT * FROM {table}{condition} ORDER BY id {order} LIMIT ?"
+    args.append(per_page)
+    if after is None and before is None and offset:
+        query += " OFFSET ?"
+        args.append(offset)
+    rows = conn.execute(query, args).fetchall()
+    if order == "DESC":
+        rows.reverse()
+
+    prev_cursor = next_cursor = None
+    if rows:
+        probe = f"SELECT 1 FROM {table} WHERE " + " AND ".join(list(where) + ["id {} ?"]) + " LIMIT 1"
+        if conn.execute(probe.format("<"), list(params) + [rows[0]["id"]]).fetchone():
+            prev_cursor = rows[0]["id"]
+        if conn.execute(probe.format(">"), list(params) + [rows[-1]["id"]]).fetchone():
+            next_cursor = rows[-1]["id"]
+    return rows, prev_cursor, next_cursor
+
 @app.get("/admin/dashboard", response_class=HTMLResponse)
-def admin_dashboard(request: Request, class_name: str = None, page: int = 1, per_page: int = 10):
+def admin_dashboard(request: Request, class_name: str = None, page: int = 1, per_page: int = 10, msg: str = "",
+                    after: int = None, before: int = None, links_after: int = None, links_before: int = None):
     if not request.session.get("admin"):
         return RedirectResponse("/admin/login?msg=Please+login", status_code=303)
 
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), 500)
+    offset = (page - 1) * per_page
+    where, params = (["class_name = ?"], [class_name]) if class_name else ([], [])
+
     conn = get_db_connection()
-    classes = [r["class_name"] for r in conn.execute(
-        "SELECT DISTINCT class_name FROM students ORDER BY class_name"
-    ).fetchall()]
+    summary = load_class_summary(conn)
+    classes = [r["class_name"] for r in summary]
+    selected = next((r for r in summary if r["class_name"] == class_name), None)
+    if class_name:
+        total_students = selected["student_count"] if selected else 0
+        total_links = selected["link_count"] if selected else 0
+    else:
+        total_students = sum(r["student_count"] for r in summary)
+        total_links = sum(r["link_count"] for r in summary)
 
     # Students pagination
-    student_query = "SELECT * FROM students"
-    params = []
-    if class_name:
-        student_query += " WHERE class_name = ?"
-        params.append(class_name)
-    total_students = conn.execute(f"SELECT COUNT(*) FROM ({student_query})", params).fetchone()[0]
-    offset = (page - 1) * per_page
-    student_query += " LIMIT ? OFFSET ?"
-    params.extend([per_page, offset])
-    students = conn.execute(student_query, params).fetchall()
+    students, students_prev, students_next = keyset_page(
+        conn, "students", where, params, per_page, after, before, offset
+    )
 
     # Links pagination
-    link_query = "SELECT * FROM links"
-    link_params = []
-    if class_name:
-        link_query += " WHERE class_name = ?"
-        link_params.append(class_name)
-    total_links = conn.execute(f"SELECT COUNT(*) FROM ({link_query})", link_params).fetchone()[0]
-    link_query += " LIMIT ? OFFSET ?"
-    link_params.extend([per_page, offset])
-    links = conn.execute(link_query, link_params).fetchall()
-
-    active_link = conn.execute(
-        "SELECT * FROM links WHERE class_name = ? AND is_active = 1 LIMIT 1",
-        (class_name,) if class_name else ("JSS1",)
-    ).fetchone()
+    links, links_prev, links_next = keyset_page(
+        conn, "links", where, params, per_page, links_after, links_before, offset
+    )
 
     conn.close()
 
+    active_link = None
+    if selected and selected["active_link_id"]:
+        active_link = {"id": selected["active_link_id"], "name": selected["active_name"], "url": selected["active_url"]}
+
     total_pages_students = (total_students + per_page - 1) // per_page
     total_pages_links = (total_links + per_page - 1) // per_page
 
+    def pager_url(**cursor):
+        query = {"class_name": class_name} if class_name else {}
+        if per_page != 10:
+            query["per_page"] = per_page
+        query.update(cursor)
+        return "?" + urlencode(query)
+
+    cursor_mode = any(c is not None for c in (after, before, links_after, links_before))
+
     return templates.TemplateResponse("admin_dashboard.html", {
         "request": request,
         "students": students,
         "links": links,
         "classes": classes,
+        "class_summary": summary,
+        "today": time.strftime("%Y-%m-%d", time.gmtime()),
         "selected_class": class_name,
         "active_link": active_link,
+        "msg": msg,
         "page": page,
+        "cursor_mode": cursor_mode,
+        "pager_url": pager_url,
+        "total_students": total_students,
+        "total_links": total_links,
         "total_pages_students": total_pages_students,
-        "total_pages_links": total_pages_links
+        "total_pages_links": total_pages_links,
+        "students_prev_url": pager_url(before=students_prev) if students_prev else None,
+        "students_next_url": pager_url(after=students_next) if students_next else None,
+        "links_prev_url": pager_url(links_before=links_prev) if links_prev else None,
+        "links_next_url": pager_url(links_after=links_next) if links_next else None,
     })
 
 # ---------------------------------------------
-# ADMIN STUDENT MANAGEMENT
+# ADMIN STUDENT SEARCH (type-ahead)
 # ---------------------------------------------
-@app.post("/admin/upload_csv")
-async def upload_csv(csv_file: UploadFile = File(...)):
-    content = await csv_file.read()
-    reader = csv.reader(StringIO(content.decode("utf-8")))
+SEARCH_MIN_NAME_CHARS = 3  # trigram index needs at least one full trigram
+
+def search_students(conn, q, limit, class_name=None):
+    # Admission-number prefix matches first (range scan on the UNIQUE index),
+    # then name substring matches from the FTS index. Neither path scans students.
+    results, seen = [], set()
+    class_filter = " AND class_name = ?" if class_name else ""
+    for variant in dict.fromkeys((q, q.upper())):
+        params = [variant, variant + "\U0010ffff"] + ([class_name] if class_name else []) + [limit]
+        for r in conn.execute(
+            "SELECT name, admission_number, class_name FROM students "
+            # The unary + keeps the planner (no ANALYZE stats) from picking
+            # idx_students_class and sorting the whole class into a temp B-tree
+            f"WHERE admission_number >= ? AND admission_number < ?{class_filter.replace('class_name', '+class_name')} "
+            "ORDER BY admission_number LIMIT ?", params
+        ):
+            if r["admission_number"] not in seen:
+                seen.add(r["admission_number"])
+                results.append(dict(r))
+    if SEARCH_FTS_ENABLED and len(q) >= SEARCH_MIN_NAME_CHARS and len(results) < limit:
+        phrase = '"' + q.replace('"', '""') + '"'
+        params = [phrase] + ([class_name] if class_name else []) + [limit + len(results)]
+        for r in conn.execute(
+            "SELECT s.name, s.admission_number, s.class_name FROM students_fts "
+            "JOIN students s ON s.id = students_fts.rowid "
+            f"WHERE students_fts MATCH ?{class_filter.replace('class_name', 's.class_name')} LIMIT ?", params
+        ):
+            if r["admission_number"] not in seen:
+                seen.add(r["admission_number"])
+                results.append(dict(r))
+    return results[:limit]
+
+@app.get("/admin/search")
+def admin_search(request: Request, q: str = "", limit: int = 20, class_name: str = None):
+    if not request.session.get("admin"):
+        return JSONResponse({"detail": "Not authenticated."}, status_code=401)
+    q = q.strip()
+    if not q:
+        return JSONResponse({"results": []})
+    start = time.perf_counter()
     conn = get_db_connection()
-    for row in reader:
-        if len(row) >= 3:
-            name, adm, class_name = row[0].strip(), row[1].strip(), row[2].strip()
-            try:
-                conn.execute(
-                    "INSERT INTO students (name, admission_number, class_name) VALUES (?, ?, ?)",
-                    (name, adm, class_name)
-                )
-            except sqlite3.IntegrityError:
-                continue
-    conn.commit()
+    results = search_students(conn, q, min(max(limit, 1), 100), class_name or None)
     conn.close()
-    return RedirectResponse("/admin/dashboard", status_code=303)
+    return JSONResponse({"results": results, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+# ---------------------------------------------
+# ADMIN STUDENT MANAGEMENT
+# ---------------------------------------------
+def admin_result(request, report, msg, class_name=None):
+    # JSON report for API clients, dashboard redirect with a message otherwise
+    if "application/json" in request.headers.get("accept", ""):
+        return JSONResponse(report, status_code=400 if "error" in report else 200)
+    query = {"class_name": class_name, "msg": msg} if class_name else {"msg": msg}
+    return RedirectResponse(f"/admin/dashboard?{urlencode(query)}", status_code=303)
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+
+SYNC_SAMPLE_SIZE = 20
+
+def read_roster_csv(fileobj, report):
+    # Yields (name, admission_number, class_name) from a binary file object
+    # (plain or gzip, as written by /admin/export/students), counting bad rows.
+    # Always starts from the top: a job reads the file once to count its rows.
+    fileobj.seek(0)
+    if fileobj.read(2) == b"\x1f\x8b":
+        fileobj.seek(0)
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode="rb")
+    else:
+        fileobj.seek(0)
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        for row in csv.reader(text):
+            if not row:
+                continue
+            if len(row) < 3 or not row[1].strip():
+                report["malformed"] += 1
+                continue
+            yield row[0].strip(), row[1].strip(), row[2].strip()
+    finally:
+        text.detach()
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def checkpoint(conn, job, progress, total=None, **state):
+    # Commits one chunk of a bulk write, together with the job's progress
+    if job:
+        job.checkpoint(conn, progress, total, **state)
+    else:
+        conn.commit()
+
+def import_students_csv(fileobj, batch_size=IMPORT_BATCH_SIZE, job=None):
+    # Inserts new students, committing every batch so logins can interleave;
+    # existing admission numbers are left alone. A resumed job skips the rows
+    # its last checkpoint already covered.
+    start = time.perf_counter()
+    report = {"inserted": 0, "skipped": 0, "malformed": 0}
+    done = job.state.get("rows_done", 0) if job else 0
+    inserted = job.state.get("inserted", 0) if job else 0
+    total = sum(1 for _ in read_roster_csv(fileobj, {"malformed": 0})) if job else None
+    records = read_roster_csv(fileobj, report)
+    conn = get_db_connection()
+    try:
+        for batch in batched(itertools.islice(records, done, None), batch_size):
+            conn.execute("BEGIN IMMEDIATE")
+            numbers = [row[1] for row in batch]
+            existing = {r[0] for r in conn.execute(
+                f"SELECT admission_number FROM students WHERE admission_number IN ({','.join('?' * len(numbers))})",
+                numbers
+            )}
+            new = {}
+            for row in batch:
+                if row[1] not in existing:
+                    new.setdefault(row[1], row)
+            for admission_number in new:
+                student_filter.add(admission_number)
+            inserted += conn.executemany(
+                "INSERT OR IGNORE INTO students (name, admission_number, class_name) VALUES (?, ?, ?)",
+                list(new.values())
+            ).rowcount
+            done += len(batch)
+            version = bump_cache_version(conn, "students") if new else None
+            checkpoint(conn, job, done, total, rows_done=done, inserted=inserted)
+            if version:
+                for name, admission_number, class_name in new.values():
+                    login_cache.set_student(admission_number, class_name)
+                login_cache.note_version("students", version)
+    finally:
+        records.close()  # before the caller closes the file under it
+        conn.close()
+    report.update(inserted=inserted, skipped=done - inserted)
+    if NEGATIVE_FILTER_ENABLED and student_filter.over_capacity():
+        rebuild_student_filter()
+    report["elapsed_ms"] = elapsed_ms(start)
+    return report
+
+def sync_students_csv(fileobj, dry_run=False, batch_size=IMPORT_BATCH_SIZE, job=None):
+    # Makes students match the uploaded roster. The file is staged in a temp
+    # table, the difference is computed in SQL, and only added, removed and
+    # changed rows are written, in one transaction together with the diff, so
+    # logins never see a half-applied roster. A resumed job simply starts over.
+    start = time.perf_counter()
+    report = {"mode": "sync", "dry_run": dry_run, "rows": 0, "malformed": 0,
+              "added": 0, "removed": 0, "changed": 0}
+    conn = get_db_connection()
+    applied = False
+    try:
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS roster_upload (
+                admission_number TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                class_name TEXT NOT NULL
+            )
+        """)
+        conn.execute("DELETE FROM roster_upload")
+        for batch in batched(read_roster_csv(fileobj, report), batch_size):
+            conn.executemany(
+                "INSERT OR REPLACE INTO roster_upload (name, admission_number, class_name) VALUES (?, ?, ?)",
+                batch
+            )
+        conn.commit()  # staging only touches the temp table
+        report["rows"] = conn.execute("SELECT COUNT(*) FROM roster_upload").fetchone()[0]
+        if not report["rows"]:
+            report["error"] = "No valid rows in the file; refusing to remove every student."
+            return report
+
+        if not dry_run:
+            conn.execute("BEGIN IMMEDIATE")  # the diff must still hold when it is applied
+        added = conn.execute("""
+            SELECT u.name, u.admission_number, u.class_name FROM roster_upload u
+            WHERE NOT EXISTS (SELECT 1 FROM students s WHERE s.admission_number = u.admission_number)
+        """).fetchall()
+        removed = [r[0] for r in conn.execute("""
+            SELECT admission_number FROM students s
+            WHERE NOT EXISTS (SELECT 1 FROM roster_upload u WHERE u.admission_number = s.admission_number)
+        """)]
+        changed = conn.execute("""
+            SELECT u.name, u.admission_number, u.class_name, s.name AS old_name, s.class_name AS old_class
+            FROM roster_upload u JOIN students s ON s.admission_number = u.admission_number
+            WHERE s.name != u.name OR s.class_name != u.class_name
+        """).fetchall()
+        report.update(added=len(added), removed=len(removed), changed=len(changed), samples={
+            "added": [r["admission_number"] for r in added[:SYNC_SAMPLE_SIZE]],
+            "removed": removed[:SYNC_SAMPLE_SIZE],
+            "changed": [{"admission_number": r["admission_number"],
+                         "name": [r["old_name"], r["name"]],
+                         "class_name": [r["old_class"], r["class_name"]]} for r in changed[:SYNC_SAMPLE_SIZE]],
+        })
+        if dry_run or not (added or removed or changed):
+            return report
+
+        for r in added:
+            student_filter.add(r["admission_number"])
+        conn.executemany(
+            "INSERT INTO students (name, admission_number, class_name) VALUES (?, ?, ?) "
+            "ON CONFLICT (admission_number) DO UPDATE SET name = excluded.name, class_name = excluded.class_name",
+            [(r["name"], r["admission_number"], r["class_name"]) for r in list(added) + list(changed)]
+        )
+        conn.executemany("DELETE FROM students WHERE admission_number = ?", [(a,) for a in removed])
+        version = bump_cache_version(conn, "students")
+        total = len(added) + len(removed) + len(changed)
+        checkpoint(conn, job, total, total)
+        applied = True
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute("DROP TABLE IF EXISTS temp.roster_upload")
+        conn.close()
+        report["elapsed_ms"] = elapsed_ms(start)
+
+    if applied:
+        for r in list(added) + list(changed):
+            login_cache.set_student(r["admission_number"], r["class_name"])
+        for admission_number in removed:
+            login_cache.remove_student(admission_number)
+        login_cache.note_version("students", version)
+        if NEGATIVE_FILTER_ENABLED and student_filter.over_capacity():
+            rebuild_student_filter()
+    return report
+
+def upload_message(report, mode, dry_run):
+    if "error" in report:
+        return report["error"]
+    if mode == "sync":
+        prefix = "Dry run, nothing applied" if dry_run else "Roster synced"
+        return (f"{prefix}: {report['added']} added, {report['removed']} removed, {report['changed']} updated "
+                f"({report['rows']} rows, {report['malformed']} malformed, {report['elapsed_ms']} ms)")
+    return (f"Imported {report['inserted']} students, skipped {report['skipped']} duplicates, "
+            f"{report['malformed']} malformed rows ({report['elapsed_ms']} ms)")
+
+def spool_upload(fileobj):
+    # Jobs read the upload after the request is gone, so it is kept on disk
+    os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+    path = os.path.join(JOB_SPOOL_DIR, f"upload-{secrets.token_hex(8)}.csv")
+    with open(path, "wb") as f:
+        shutil.copyfileobj(fileobj, f)
+    return path
+
+@app.post("/admin/upload_csv")
+async def upload_csv(request: Request, csv_file: UploadFile = File(...), mode: str = Form("insert"),
+                     dry_run: bool = Form(False)):
+    if JOBS_ENABLED and not (mode == "sync" and dry_run):
+        path = await run_in_threadpool(spool_upload, csv_file.file)
+        job_id = await run_in_threadpool(job_runner.submit, "import_students",
+                                         {"path": path, "mode": mode, "filename": csv_file.filename})
+        return job_accepted(request, job_id, f"Upload of {csv_file.filename}")
+    if mode == "sync":
+        report = await run_in_threadpool(sync_students_csv, csv_file.file, dry_run)
+    else:
+        report = await run_in_threadpool(import_students_csv, csv_file.file)
+    return admin_result(request, report, upload_message(report, mode, dry_run))
 
 @app.post("/admin/add_student")
 def add_student(name: str = Form(...), admission_number: str = Form(...), class_name: str = Form(...)):
     conn = get_db_connection()
+    student_filter.add(admission_number)
     try:
         conn.execute(
             "INSERT INTO students (name, admission_number, class_name) VALUES (?, ?, ?)",
             (name, admission_number, class_name)
         )
+        version = bump_cache_version(conn, "students")
         conn.commit()
+        login_cache.set_student(admission_number, class_name)
+        login_cache.note_version("students", version)
     except sqlite3.IntegrityError:
         pass
     conn.close()
@@ -204,17 +1672,371 @@ def add_student(name: str = Form(...), admission_number: str = Form(...), class_
 def delete_student(admission_number: str = Form(...)):
     conn = get_db_connection()
     conn.execute("DELETE FROM students WHERE admission_number = ?", (admission_number,))
+    version = bump_cache_version(conn, "students")
     conn.commit()
     conn.close()
+    login_cache.remove_student(admission_number)
+    login_cache.note_version("students", version)
     return RedirectResponse("/admin/dashboard", status_code=303)
 
 @app.post("/admin/delete_all_students")
-def delete_all_students():
+def delete_all_students(request: Request):
+    if not request.session.get("admin"):
+        return RedirectResponse("/admin/login?msg=Please+login", status_code=303)
+    if JOBS_ENABLED:
+        return job_accepted(request, job_runner.submit("delete_students", {"class_name": None}),
+                            "Deleting all students")
+    report = delete_students_at_once()
+    return admin_result(request, report, delete_message(report))
+
+# ---------------------------------------------
+# ADMIN BULK STUDENT OPERATIONS
+# ---------------------------------------------
+BULK_DELETE_CHUNK = 500
+
+def delete_students_at_once(class_name=None):
+    # Deletes a class (or everyone) with one set-based DELETE; used when jobs
+    # are off, so the request sees the whole delete or none of it.
+    start = time.perf_counter()
+    where, params = ("WHERE class_name = ?", (class_name,)) if class_name else ("", ())
     conn = get_db_connection()
-    conn.execute("DELETE FROM students")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        removed = [r[0] for r in conn.execute(f"SELECT admission_number FROM students {where}", params)] \
+            if class_name else None
+        deleted = conn.execute(f"DELETE FROM students {where}", params).rowcount
+        version = bump_cache_version(conn, "students")
+        conn.commit()
+    finally:
+        conn.close()
+    if class_name:
+        for admission_number in removed:
+            login_cache.remove_student(admission_number)
+    else:
+        login_cache.clear_students()
+    login_cache.note_version("students", version)
+    if NEGATIVE_FILTER_ENABLED and not class_name:
+        rebuild_student_filter()
+    return {"class_name": class_name, "deleted": deleted, "elapsed_ms": elapsed_ms(start)}
+
+def delete_students_chunked(class_name=None, job=None, batch_size=BULK_DELETE_CHUNK):
+    # Background-job version: BULK_DELETE_CHUNK rows per transaction, so the
+    # write lock is released between chunks; a resumed job just carries on.
+    start = time.perf_counter()
+    where, params = ("WHERE class_name = ?", [class_name]) if class_name else ("", [])
+    deleted = job.state.get("deleted", 0) if job else 0
+    conn = get_db_connection()
+    try:
+        total = deleted + conn.execute(
+            f"SELECT COALESCE(SUM(student_count), 0) FROM class_summary {where}", params
+        ).fetchone()[0]
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                f"SELECT id, admission_number FROM students {where} ORDER BY id LIMIT ?", params + [batch_size]
+            ).fetchall()
+            if not rows:
+                conn.commit()
+                break
+            conn.execute(f"DELETE FROM students WHERE id IN ({','.join('?' * len(rows))})", [r[0] for r in rows])
+            version = bump_cache_version(conn, "students")
+            deleted += len(rows)
+            checkpoint(conn, job, deleted, total, deleted=deleted)
+            for r in rows:
+                login_cache.remove_student(r[1])
+            login_cache.note_version("students", version)
+    finally:
+        conn.close()
+    if NEGATIVE_FILTER_ENABLED and not class_name:
+        rebuild_student_filter()
+    return {"class_name": class_name, "deleted": deleted, "elapsed_ms": elapsed_ms(start)}
+
+def delete_message(report):
+    scope = f" from {report['class_name']}" if report["class_name"] else ""
+    return f"Deleted {report['deleted']} students{scope} ({report['elapsed_ms']} ms)"
+
+@app.post("/admin/delete_class")
+def delete_class(request: Request, class_name: str = Form(...)):
+    if not request.session.get("admin"):
+        return RedirectResponse("/admin/login?msg=Please+login", status_code=303)
+    if JOBS_ENABLED:
+        return job_accepted(request, job_runner.submit("delete_students", {"class_name": class_name}),
+                            f"Deleting class {class_name}")
+    report = delete_students_at_once(class_name)
+    return admin_result(request, report, delete_message(report))
+
+@app.post("/admin/rename_class")
+def rename_class(request: Request, from_class: str = Form(...), to_class: str = Form(...),
+                 include_links: bool = Form(False)):
+    # Moves every student of from_class into to_class (promotion or rename). With
+    # include_links the class's links follow; the target keeps its active link if
+    # it already has one.
+    if not request.session.get("admin"):
+        return RedirectResponse("/admin/login?msg=Please+login", status_code=303)
+    from_class, to_class = from_class.strip(), to_class.strip()
+    if not to_class or from_class == to_class:
+        report = {"error": "Choose a different target class."}
+        return admin_result(request, report, report["error"], from_class)
+    start = time.perf_counter()
+    conn = get_db_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    moved_students = [r[0] for r in conn.execute(
+        "SELECT admission_number FROM students WHERE class_name = ?", (from_class,)
+    )]
+    moved = conn.execute(
+        "UPDATE students SET class_name = ? WHERE class_name = ?", (to_class, from_class)
+    ).rowcount
+    version = bump_cache_version(conn, "students")
+    moved_links = 0
+    if include_links:
+        moved_links = conn.execute(
+            "UPDATE links SET class_name = ? WHERE class_name = ?", (to_class, from_class)
+        ).rowcount
+        conn.execute(
+            "INSERT OR IGNORE INTO active_links (class_name, link_id, url) "
+            "SELECT ?, link_id, url FROM active_links WHERE class_name = ?", (to_class, from_class)
+        )
+        conn.execute("DELETE FROM active_links WHERE class_name = ?", (from_class,))
+        conn.execute(
+            "UPDATE links SET is_active = (id IN (SELECT link_id FROM active_links)) WHERE class_name = ?",
+            (to_class,)
+        )
+        bump_cache_version(conn, "active_links")
     conn.commit()
+    if include_links:
+        login_cache.load(conn, ("active_links",))
     conn.close()
-    return RedirectResponse("/admin/dashboard", status_code=303)
+    for admission_number in moved_students:
+        login_cache.set_student(admission_number, to_class)
+    login_cache.note_version("students", version)
+    report = {"from_class": from_class, "to_class": to_class, "students": moved,
+              "links": moved_links, "elapsed_ms": elapsed_ms(start)}
+    msg = f"Moved {moved} students{f' and {moved_links} links' if include_links else ''} from {from_class} to {to_class} ({report['elapsed_ms']} ms)"
+    return admin_result(request, report, msg, to_class)
+
+@app.post("/admin/delete_students")
+def delete_students(request: Request, admission_numbers: List[str] = Form(...)):
+    # Accepts repeated admission_numbers fields (dashboard checkboxes) and/or a
+    # pasted list separated by commas or whitespace.
+    if not request.session.get("admin"):
+        return RedirectResponse("/admin/login?msg=Please+login", status_code=303)
+    numbers = list(dict.fromkeys(n for field in admission_numbers for n in re.split(r"[\s,]+", field) if n))
+    start = time.perf_counter()
+    conn = get_db_connection()
+    deleted = 0
+    for i in range(0, len(numbers), BULK_DELETE_CHUNK):
+        chunk = numbers[i:i + BULK_DELETE_CHUNK]
+        deleted += conn.execute(
+            f"DELETE FROM students WHERE admission_number IN ({','.join('?' * len(chunk))})", chunk
+        ).rowcount
+    version = bump_cache_version(conn, "students")
+    conn.commit()
+    conn.close()
+    for admission_number in numbers:
+        login_cache.remove_student(admission_number)
+    login_cache.note_version("students", version)
+    report = {"requested": len(numbers), "deleted": deleted, "elapsed_ms": elapsed_ms(start)}
+    return admin_result(request, report, f"Deleted {deleted} of {len(numbers)} selected students ({report['elapsed_ms']} ms)")
+
+# ---------------------------------------------
+# BACKGROUND JOBS (long admin operations)
+# ---------------------------------------------
+# Imports and bulk deletes run on a small pool of worker threads instead of
+# inside the request. The jobs table is the queue: workers claim the oldest
+# queued job with a conditional UPDATE, so several uvicorn workers can share
+# it, and a job whose heartbeat stops (the process died) is claimed again.
+# Each committed chunk records the job's progress in the same transaction.
+JOBS_ENABLED = os.environ.get("JOBS_ENABLED", "1") != "0"
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))  # SQLite has one writer; more only helps mixed jobs
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "2"))
+JOB_STALE_SECONDS = float(os.environ.get("JOB_STALE_SECONDS", "30"))
+JOB_SPOOL_DIR = os.environ.get("JOB_SPOOL_DIR", DB_FILE + "-jobs")
+
+class JobInterrupted(Exception):
+    pass
+
+class Job:
+    def __init__(self, row, stopping):
+        self.id = row["id"]
+        self.kind = row["kind"]
+        self.params = json.loads(row["params"])
+        self.state = json.loads(row["state"])
+        self.stopping = stopping
+
+    def checkpoint(self, conn, progress, total=None, **state):
+        # Commits the caller's chunk and the job's progress together; stops
+        # after the commit when the server is shutting down.
+        self.state.update(state)
+        conn.execute(
+            "UPDATE jobs SET progress = ?, total = COALESCE(?, total), state = ?, heartbeat_at = ? WHERE id = ?",
+            (progress, total, json.dumps(self.state), time.time(), self.id)
+        )
+        conn.commit()
+        if self.stopping.is_set():
+            raise JobInterrupted()
+
+def run_import_job(job):
+    mode = job.params["mode"]
+    with open(job.params["path"], "rb") as f:
+        report = sync_students_csv(f, job=job) if mode == "sync" else import_students_csv(f, job=job)
+    return report, upload_message(report, mode, False)
+
+def run_delete_job(job):
+    report = delete_students_chunked(job.params["class_name"], job=job)
+    return report, delete_message(report)
+
+JOB_HANDLERS = {
+    "import_students": run_import_job,
+    "delete_students": run_delete_job,
+}
+
+class JobRunner:
+    def __init__(self, workers):
+        self.workers = workers
+        self.threads = []
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+
+    def start(self):
+        self.stopping.clear()  # a stopped runner can be started again
+        for i in range(self.workers):
+            thread = threading.Thread(target=self.work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        # Running jobs stop at their next checkpoint and go back to queued
+        self.stopping.set()
+        self.wakeup.set()
+        for thread in self.threads:
+            thread.join(JOB_STALE_SECONDS)
+        self.threads = []
+
+    def submit(self, kind, params):
+        conn = get_db_connection()
+        job_id = conn.execute(
+            "INSERT INTO jobs (kind, params, status, created_at) VALUES (?, ?, 'queued', ?)",
+            (kind, json.dumps(params), time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()))
+        ).lastrowid
+        conn.commit()
+        conn.close()
+        self.wakeup.set()
+        return job_id
+
+    def claim(self, conn):
+        # Queued jobs first, then running ones nobody has checkpointed lately.
+        # Two separate lookups so each can walk idx_jobs_status in id order.
+        stale = time.time() - JOB_STALE_SECONDS
+        for claimable, params in (("status = 'queued'", ()),
+                                  ("status = 'running' AND heartbeat_at < ?", (stale,))):
+            row = conn.execute(f"SELECT * FROM jobs WHERE {claimable} ORDER BY id LIMIT 1", params).fetchone()
+            if row is None:
+                continue
+            claimed = conn.execute(
+                f"UPDATE jobs SET status = 'running', heartbeat_at = ?, started_at = COALESCE(started_at, ?) "
+                f"WHERE id = ? AND {claimable}",
+                (time.time(), time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()), row["id"]) + params
+            ).rowcount
+            conn.commit()
+            return row if claimed else None
+        return None
+
+    def work(self):
+        while not self.stopping.is_set():
+            conn = get_db_connection()
+            try:
+                row = self.claim(conn)
+            except sqlite3.Error as exc:
+                print(f"🔥 Job queue error: {exc}")
+                row = None
+            finally:
+                conn.close()
+            if row is None:
+                self.wakeup.wait(JOB_POLL_SECONDS)
+                self.wakeup.clear()
+                continue
+            self.run(Job(row, self.stopping))
+
+    def run(self, job):
+        print(f"⚙️ Job #{job.id} {job.kind} started")
+        status, result, error = "done", None, None
+        try:
+            report, msg = JOB_HANDLERS[job.kind](job)
+            result = json.dumps(dict(report, msg=msg))
+            if "error" in report:
+                status, error = "failed", report["error"]
+        except JobInterrupted:
+            status = "queued"
+            print(f"⏸️ Job #{job.id} interrupted, will resume on restart")
+        except Exception as exc:
+            status, error = "failed", str(exc)
+            print(f"🔥 Job #{job.id} failed: {exc}")
+        conn = get_db_connection()
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, heartbeat_at = ? WHERE id = ?",
+            (status, result, error, None if status == "queued" else time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+             time.time(), job.id)
+        )
+        conn.commit()
+        conn.close()
+        if status != "queued" and job.params.get("path"):
+            try:
+                os.remove(job.params["path"])
+            except OSError:
+                pass
+
+job_runner = JobRunner(JOB_WORKERS)
+
+@app.on_event("startup")
+def start_job_runner():
+    if JOBS_ENABLED:
+        job_runner.start()
+
+@app.on_event("shutdown")
+def stop_job_runner():
+    job_runner.stop()
+
+def job_accepted(request, job_id, what, class_name=None):
+    report = {"job_id": job_id, "status": "queued", "status_url": f"/admin/jobs/{job_id}"}
+    return admin_result(request, report, f"{what} queued as job #{job_id}; progress is shown under Background Jobs.",
+                        class_name)
+
+def job_json(row):
+    result = json.loads(row["result"]) if row["result"] else None
+    return {
+        "id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "progress": row["progress"],
+        "total": row["total"],
+        "percent": round(100 * row["progress"] / row["total"], 1) if row["total"] else None,
+        "msg": row["error"] or (result or {}).get("msg"),
+        "params": {k: v for k, v in json.loads(row["params"]).items() if k != "path"},
+        "result": result,
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+    }
+
+@app.get("/admin/jobs")
+def list_jobs(request: Request, limit: int = 10):
+    if not request.session.get("admin"):
+        return JSONResponse({"detail": "Not authenticated."}, status_code=401)
+    conn = get_db_connection()
+    rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (max(1, min(limit, 100)),)).fetchall()
+    conn.close()
+    return JSONResponse({"jobs": [job_json(r) for r in rows]})
+
+@app.get("/admin/jobs/{job_id}")
+def job_status(request: Request, job_id: int):
+    if not request.session.get("admin"):
+        return JSONResponse({"detail": "Not authenticated."}, status_code=401)
+    conn = get_db_connection()
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    if row is None:
+        return JSONResponse({"detail": "Job not found."}, status_code=404)
+    return JSONResponse(job_json(row))
 
 # ---------------------------------------------
 # ADMIN LINKS MANAGEMENT
@@ -230,12 +2052,201 @@ def upload_link(name: str = Form(...), link: str = Form(...), class_name: str =
 @app.post("/admin/set_active_link")
 def set_active_link(link_id: str = Form(...), class_name: str = Form(...)):
     conn = get_db_connection()
-    conn.execute("UPDATE links SET is_active = 0 WHERE class_name = ?", (class_name,))
-    conn.execute("UPDATE links SET is_active = 1 WHERE id = ?", (int(link_id),))
-    conn.commit()
+    link = conn.execute("SELECT id, url, class_name FROM links WHERE id = ?", (int(link_id),)).fetchone()
+    if not link or link["class_name"] != class_name:
+        conn.close()
+        msg = "That link does not belong to this class."
+        return RedirectResponse(f"/admin/dashboard?{urlencode({'class_name': class_name, 'msg': msg})}", status_code=303)
+    with conn:
+        conn.execute(
+            "INSERT INTO active_links (class_name, link_id, url) VALUES (?, ?, ?) "
+            "ON CONFLICT (class_name) DO UPDATE SET link_id = excluded.link_id, url = excluded.url",
+            (class_name, link["id"], link["url"])
+        )
+        conn.execute(
+            "UPDATE links SET is_active = (id = ?) WHERE class_name = ? AND (is_active = 1 OR id = ?)",
+            (link["id"], class_name, link["id"])
+        )
+        version = bump_cache_version(conn, "active_links")
     conn.close()
+    login_cache.set_active_link(class_name, link["url"])
+    login_cache.note_version("active_links", version)
     return RedirectResponse(f"/admin/dashboard?class_name={class_name}", status_code=303)
 
+@app.get("/admin/cache_stats")
+def cache_stats(request: Request):
+    if not request.session.get("admin"):
+        return JSONResponse({"detail": "Not authenticated."}, status_code=401)
+    return JSONResponse({**login_cache.stats(), "negative_filter": student_filter.stats(),
+                         "login_audit": login_audit.stats()})
+
+# ---------------------------------------------
+# ADMIN EXPORT (streaming CSV)
+# ---------------------------------------------
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def stream_csv(query, params, compress=False, header=None):
+    # Rows are pulled from the cursor in small batches and flushed every
+    # EXPORT_CHUNK_BYTES, so memory stays flat whatever the table size. Starlette
+    # may resume the generator on a different thread, hence its own connection.
+    conn = open_db_connection(check_same_thread=False)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    try:
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(1000)
+            if rows:
+                writer.writerows(rows)
+                if buffer.tell() < EXPORT_CHUNK_BYTES:
+                    continue
+            chunk = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            if compressor:
+                chunk = compressor.compress(chunk) + (b"" if rows else compressor.flush())
+            if chunk:
+                yield chunk
+            if not rows:
+                break
+    finally:
+        conn.close()
+
+def content_disposition(filename):
+    # Class names can hold anything: an ASCII fallback plus the RFC 6266 UTF-8 form
+    fallback = re.sub(r"[^A-Za-z0-9._-]", "_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+def csv_download(filename, query, params, compress, header=None):
+    if compress:
+        filename += ".gz"
+    return StreamingResponse(
+        stream_csv(query, params, compress, header),
+        media_type="application/gzip" if compress else "text/csv; charset=utf-8",
+        headers={"Content-Disposition": content_disposition(filename)},
+    )
+
+@app.get("/admin/export/students")
+def export_students(request: Request, class_name: str = None, compress: bool = Query(False, alias="gzip")):
+    # Same columns as upload_csv accepts, so an export can be re-imported as is
+    if not request.session.get("admin"):
+        return RedirectResponse("/admin/login?msg=Please+login", status_code=303)
+    query = "SELECT name, admission_number, class_name FROM students"
+    params = []
+    if class_name:
+        query += " WHERE class_name = ?"
+        params.append(class_name)
+    filename = f"students-{class_name}.csv" if class_name else "students.csv"
+    return csv_download(filename, query + " ORDER BY id", params, compress)
+
+@app.get("/admin/export/links")
+def export_links(request: Request, class_name: str = None, compress: bool = Query(False, alias="gzip")):
+    if not request.session.get("admin"):
+        return RedirectResponse("/admin/login?msg=Please+login", status_code=303)
+    query = "SELECT name, url, class_name, is_active FROM links"
+    params = []
+    if class_name:
+        query += " WHERE class_name = ?"
+        params.append(class_name)
+    filename = f"links-{class_name}.csv" if class_name else "links.csv"
+    return csv_download(filename, query + " ORDER BY id", params, compress)
+
+def parse_day(day):
+    # YYYY-MM-DD (UTC) -> the [start, end) range of login_events.logged_at
+    start = datetime.datetime.strptime(day, "%Y-%m-%d")
+    return start.strftime("%Y-%m-%d 00:00:00"), (start + datetime.timedelta(days=1)).strftime("%Y-%m-%d 00:00:00")
+
+@app.get("/admin/export/attendance")
+def export_attendance(request: Request, class_name: str = None, day: str = None,
+                      compress: bool = Query(False, alias="gzip")):
+    # One row per student on the roster: present if they logged in that day
+    if not request.session.get("admin"):
+        return RedirectResponse("/admin/login?msg=Please+login", status_code=303)
+    day = day or time.strftime("%Y-%m-%d", time.gmtime())
+    try:
+        start, end = parse_day(day)
+    except ValueError:
+        return PlainTextResponse("Invalid day, expected YYYY-MM-DD.", status_code=400)
+    query = """
+        SELECT s.name, s.admission_number, s.class_name,
+               CASE WHEN e.logins THEN 'present' ELSE 'absent' END,
+               e.first_login, e.last_login, COALESCE(e.logins, 0)
+        FROM students s
+        LEFT JOIN (
+            SELECT admission_number, MIN(logged_at) AS first_login, MAX(logged_at) AS last_login,
+                   COUNT(*) AS logins
+            FROM login_events
+            WHERE logged_at >= ? AND logged_at < ? AND outcome != 'invalid'
+            GROUP BY admission_number
+        ) e ON e.admission_number = s.admission_number
+    """
+    params = [start, end]
+    if class_name:
+        query += " WHERE s.class_name = ?"
+        params.append(class_name)
+    filename = f"attendance-{class_name}-{day}.csv" if class_name else f"attendance-{day}.csv"
+    header = ["name", "admission_number", "class_name", "status", "first_login_utc", "last_login_utc", "logins"]
+    return csv_download(filename, query + " ORDER BY s.class_name, s.id", params, compress, header)
+
+@app.get("/admin/export/logins")
+def export_logins(request: Request, class_name: str = None, day: str = None,
+                  compress: bool = Query(False, alias="gzip")):
+    # Raw audit trail, including unknown admission numbers and the link each login was sent to
+    if not request.session.get("admin"):
+        return RedirectResponse("/admin/login?msg=Please+login", status_code=303)
+    day = day or time.strftime("%Y-%m-%d", time.gmtime())
+    try:
+        start, end = parse_day(day)
+    except ValueError:
+        return PlainTextResponse("Invalid day, expected YYYY-MM-DD.", status_code=400)
+    query = "SELECT logged_at, admission_number, class_name, outcome, url FROM login_events WHERE logged_at >= ? AND logged_at < ?"
+    params = [start, end]
+    if class_name:
+        query += " AND class_name = ?"
+        params.append(class_name)
+    filename = f"logins-{class_name}-{day}.csv" if class_name else f"logins-{day}.csv"
+    header = ["logged_at_utc", "admission_number", "class_name", "outcome", "url"]
+    return csv_download(filename, query + " ORDER BY logged_at, id", params, compress, header)
+
+# ---------------------------------------------
+# METRICS ENDPOINT
+# ---------------------------------------------
+@app.get("/metrics")
+async def metrics_endpoint():
+    if not METRICS_ENABLED:
+        return PlainTextResponse("Metrics disabled.", status_code=404)
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    cache = login_cache.stats()
+    samples = [
+        ("threadpool_busy_threads", "gauge", limiter.borrowed_tokens),
+        ("threadpool_total_threads", "gauge", limiter.total_tokens),
+        ("threadpool_waiting_tasks", "gauge", limiter.statistics().tasks_waiting),
+        ("login_executor_running", "gauge", login_executor.running),
+        ("login_executor_waiting", "gauge", login_executor.waiting),
+        ("login_executor_queued", "gauge", login_executor.queued()),
+        ("login_cache_students", "gauge", cache["students"]),
+        ("login_cache_hits_total", "counter", cache["hits"]),
+        ("login_cache_misses_total", "counter", cache["misses"]),
+        ("negative_filter_bytes", "gauge", student_filter.stats()["bytes"]),
+        ("negative_filter_entries", "gauge", student_filter.bloom.count),
+        ("negative_filter_rejected_total", "counter", student_filter.rejected),
+        ("login_audit_queued", "gauge", login_audit.queue.qsize()),
+        ("login_audit_written_total", "counter", login_audit.written),
+        ("login_audit_dropped_total", "counter", login_audit.dropped),
+        ("login_audit_failed_total", "counter", login_audit.failed),
+    ]
+    for name, kind, value in (
+        ("admission_inflight", "gauge", lambda c: c.inflight),
+        ("admission_queued", "gauge", lambda c: len(c.waiters)),
+        ("admission_admitted_total", "counter", lambda c: c.admitted),
+        ("admission_shed_total", "counter", lambda c: c.shed),
+    ):
+        samples += [(f'{name}{{route="{path}"}}', kind, value(c)) for path, c in admission_controllers.items()]
+    return PlainTextResponse(metrics.render(samples), media_type="text/plain; version=0.0.4")
+
 # ---------------------------------------------
 # JSON STUDENT LOGIN (API)
 # ---------------------------------------------
@@ -244,25 +2255,18 @@ async def student_login_json(data: dict):
     admission_number = data.get("admission_number")
     if not admission_number:
         return JSONResponse({"detail": "Admission number required."}, status_code=400)
+    # The filter and cache key on the string; SQLite would match 12345 to '12345'
+    admission_number = str(admission_number)
 
-    conn = get_db_connection()
-    student = conn.execute(
-        "SELECT * FROM students WHERE admission_number = ?", (admission_number,)
-    ).fetchone()
-    if not student:
-        conn.close()
+    found, url = await resolve_student_login_async(admission_number)
+    record_login(admission_number, found, url)
+    if not found:
         return JSONResponse({"detail": "Invalid Admission Number."}, status_code=401)
 
-    active_link = conn.execute(
-        "SELECT url FROM links WHERE class_name = ? AND is_active = 1 LIMIT 1",
-        (student["class_name"],)
-    ).fetchone()
-    conn.close()
-
-    if not active_link:
+    if not url:
         return JSONResponse({"detail": "No active form link."}, status_code=404)
 
-    return JSONResponse({"form_link": active_link["url"]})
+    return JSONResponse({"form_link": url})
 
 # ---------------------------------------------
 # GLOBAL ERROR HANDLERS
@@ -0,0 +1,36 @@
+import os, sys, tempfile, time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# main reads its configuration and opens the database at import time
+_tmp = tempfile.mkdtemp(prefix="school-tests-")
+os.environ.update(
+    DB_FILE=os.path.join(_tmp, "school.db"),
+    JOB_POLL_SECONDS="0.05",
+    CACHE_SYNC_INTERVAL_MS="50",
+)
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+import main  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    # Entering the client runs the startup hooks (job runner, audit log, cache sync)
+    with TestClient(main.app) as c:
+        c.post("/admin/login", data={"username": "admin", "password": "admin123"})
+        yield c
+
+
+def wait_for_job(client, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/admin/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
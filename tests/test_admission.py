@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+import main
+
+
+async def queued_acquire(controller):
+    task = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert len(controller.waiters) == 1
+    return task
+
+
+def test_waiter_admitted_in_order_and_shed_when_queue_full():
+    async def scenario():
+        controller = main.AdmissionController(1, 1, 5)
+        assert await controller.acquire()
+        task = await queued_acquire(controller)
+        assert not await controller.acquire()
+        controller.release()
+        assert await task
+        assert controller.inflight == 1 and controller.shed == 1
+        controller.release()
+        assert controller.inflight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = main.AdmissionController(1, 4, 5)
+        assert await controller.acquire()
+        task = await queued_acquire(controller)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not controller.waiters
+        controller.release()
+        assert controller.inflight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancel_after_handoff_passes_the_slot_on():
+    async def scenario():
+        controller = main.AdmissionController(1, 4, 5)
+        assert await controller.acquire()
+        cancelled = await queued_acquire(controller)
+        follower = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        # The slot is handed to the first waiter, which is cancelled before it resumes
+        controller.release()
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert await follower
+        assert controller.inflight == 1
+        controller.release()
+        assert controller.inflight == 0 and not controller.waiters
+
+    asyncio.run(scenario())
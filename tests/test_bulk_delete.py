@@ -0,0 +1,28 @@
+import main
+
+JSON = {"accept": "application/json"}
+
+
+def test_inline_class_delete_is_one_statement(client, monkeypatch):
+    for i in range(5):
+        client.post("/admin/add_student", data={"name": f"Bulk {i}", "admission_number": f"BULK{i}",
+                                                "class_name": "BULKDEL"})
+    client.post("/admin/add_student", data={"name": "Keep", "admission_number": "BULKKEEP", "class_name": "BULKKEEP"})
+    monkeypatch.setattr(main, "JOBS_ENABLED", False)
+    monkeypatch.setattr(main, "BULK_DELETE_CHUNK", 2)  # would take three commits if chunked
+    commits = []
+    real_checkpoint = main.checkpoint
+    monkeypatch.setattr(main, "checkpoint", lambda *a, **k: commits.append(a) or real_checkpoint(*a, **k))
+
+    report = client.post("/admin/delete_class", data={"class_name": "BULKDEL"}, headers=JSON).json()
+    assert report["deleted"] == 5 and commits == []
+    assert main.resolve_student_login("BULK0") == (False, None)
+    assert main.resolve_student_login("BULKKEEP")[0]
+
+
+def test_delete_all_students_requires_admin(client):
+    client.post("/admin/add_student", data={"name": "Safe", "admission_number": "SAFE1", "class_name": "SAFE"})
+    client.cookies.clear()
+    response = client.post("/admin/delete_all_students", follow_redirects=False)
+    assert response.status_code == 303 and response.headers["location"].startswith("/admin/login")
+    assert main.resolve_student_login("SAFE1")[0]
@@ -0,0 +1,51 @@
+import threading
+
+import main
+
+
+def summary_and_truth():
+    conn = main.get_db_connection()
+    summary = {r[0]: (r[1], r[2]) for r in conn.execute(
+        "SELECT class_name, student_count, link_count FROM class_summary WHERE student_count > 0 OR link_count > 0"
+    )}
+    truth = {}
+    for table, column in (("students", 0), ("links", 1)):
+        for class_name, count in conn.execute(f"SELECT class_name, COUNT(*) FROM {table} GROUP BY class_name"):
+            counts = list(truth.get(class_name, (0, 0)))
+            counts[column] = count
+            truth[class_name] = tuple(counts)
+    conn.close()
+    return summary, truth
+
+
+def test_concurrent_first_start_counts_each_class_once(client):
+    for i in range(3):
+        client.post("/admin/add_student", data={"name": f"Summary {i}", "admission_number": f"SUM{i}",
+                                                "class_name": "SUMMARY1"})
+    conn = main.get_db_connection()
+    # Back to a database from before class_summary existed
+    for (trigger,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'class_summary_%'").fetchall():
+        conn.execute(f"DROP TRIGGER {trigger}")
+    conn.execute("DROP TABLE class_summary")
+    conn.commit()
+    conn.close()
+
+    errors, barrier = [], threading.Barrier(8)
+
+    def start_worker():
+        barrier.wait()
+        try:
+            main.init_class_summary()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=start_worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    main.init_class_summary()  # a later restart
+
+    assert not errors
+    summary, truth = summary_and_truth()
+    assert summary == truth and summary["SUMMARY1"] == (3, 0)
@@ -0,0 +1,15 @@
+from urllib.parse import quote
+
+import pytest
+
+
+@pytest.mark.parametrize("path", ["/admin/export/students", "/admin/export/links",
+                                  "/admin/export/attendance", "/admin/export/logins"])
+@pytest.mark.parametrize("class_name", ["Ω-Класс", 'JSS "A"'])
+def test_export_filename_survives_any_class_name(client, path, class_name):
+    response = client.get(path, params={"class_name": class_name})
+    assert response.status_code == 200
+    disposition = response.headers["content-disposition"]
+    fallback = disposition.split('filename="', 1)[1].split('"', 1)[0]
+    assert fallback.isascii() and '"' not in fallback
+    assert f"filename*=UTF-8''{quote(path.rsplit('/', 1)[1] + '-' + class_name, safe='')}" in disposition
@@ -0,0 +1,17 @@
+import os, subprocess, sys
+
+from conftest import ROOT
+
+
+def test_main_imports_from_another_directory(tmp_path):
+    env = dict(os.environ, DB_FILE=str(tmp_path / "school.db"), PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, "-c", "import main; print(len(main.login_pages))"],
+                            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert int(result.stdout) >= 1
+
+
+def test_login_page_is_served_compressed(client):
+    response = client.get("/", headers={"accept-encoding": "gzip"})
+    assert response.status_code == 200 and "<form" in response.text
+    assert response.headers["content-encoding"] == "gzip" and response.headers["etag"]
@@ -0,0 +1,78 @@
+import main
+from conftest import wait_for_job
+
+JSON = {"accept": "application/json"}
+
+
+def class_students(class_name):
+    conn = main.get_db_connection()
+    rows = conn.execute(
+        "SELECT name, admission_number FROM students WHERE class_name = ? ORDER BY admission_number", (class_name,)
+    ).fetchall()
+    conn.close()
+    return [tuple(r) for r in rows]
+
+
+def test_gzip_export_reimports_through_job(client):
+    roster = "".join(f"Gzip Student {i},GZ{i:04d},GZIP1\n" for i in range(50))
+    job = wait_for_job(client, client.post("/admin/upload_csv", files={"csv_file": ("r.csv", roster.encode())},
+                                           headers=JSON).json()["job_id"])
+    assert job["status"] == "done"
+    before = class_students("GZIP1")
+    assert len(before) == 50
+
+    export = client.get("/admin/export/students", params={"class_name": "GZIP1", "gzip": "true"})
+    assert export.status_code == 200
+    assert export.content[:2] == b"\x1f\x8b"
+    backup = export.content
+
+    job = wait_for_job(client, client.post("/admin/delete_class", data={"class_name": "GZIP1"},
+                                           headers=JSON).json()["job_id"])
+    assert job["status"] == "done" and class_students("GZIP1") == []
+
+    job = wait_for_job(client, client.post("/admin/upload_csv", files={"csv_file": ("backup.csv.gz", backup)},
+                                           headers=JSON).json()["job_id"])
+    assert job["status"] == "done", job["msg"]
+    assert job["result"]["inserted"] == 50
+    assert class_students("GZIP1") == before
+
+
+def test_a_job_is_claimed_by_only_one_worker():
+    conn = main.get_db_connection()
+    job_id = conn.execute(
+        "INSERT INTO jobs (kind, params, status, created_at) VALUES ('claim_test', '{}', 'queued', 'now')"
+    ).lastrowid
+    conn.commit()
+    first, second = main.JobRunner(0), main.JobRunner(0)
+    other = main.open_db_connection()
+    claimed_by_second = []
+
+    class RaceAfterSelect:
+        # The second worker claims the job between the first one's SELECT and UPDATE
+        def execute(self, sql, params=()):
+            result = conn.execute(sql, params)
+            if sql.startswith("SELECT") and not claimed_by_second:
+                claimed_by_second.append(second.claim(other))
+            return result
+
+        def commit(self):
+            conn.commit()
+
+    try:
+        assert first.claim(RaceAfterSelect()) is None
+        assert claimed_by_second[0]["id"] == job_id
+    finally:
+        conn.execute("UPDATE jobs SET status = 'done' WHERE id = ?", (job_id,))
+        conn.commit()
+        conn.close()
+        other.close()
+
+
+def test_runner_runs_jobs_again_after_a_restart(client):
+    # The fixture's shutdown stopped the runner before; this startup restarted it
+    main.job_runner.stop()
+    main.job_runner.start()
+    roster = "Restart Student,RST1,RESTART1\n"
+    job = wait_for_job(client, client.post("/admin/upload_csv", files={"csv_file": ("r.csv", roster.encode())},
+                                           headers=JSON).json()["job_id"])
+    assert job["status"] == "done"
@@ -0,0 +1,10 @@
+import main
+
+
+def test_long_admission_numbers_are_truncated_before_queueing():
+    audit = main.LoginAuditLog(10, 1000, 10)
+    audit.record("X" * 1_000_000, False, None)
+    audit.record(12345, False, None)
+    queued = [audit.queue.get_nowait() for _ in range(2)]
+    assert queued[0][0] == "X" * main.LOGIN_AUDIT_MAX_ADMISSION_CHARS
+    assert queued[1][0] == "12345"
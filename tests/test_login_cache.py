@@ -0,0 +1,117 @@
+import collections, threading, time
+
+import main
+
+
+def peer_insert(rows):
+    # Writes the way another uvicorn worker would: its own connection, no note_version()
+    conn = main.open_db_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany("INSERT INTO students (name, admission_number, class_name) VALUES (?, ?, ?)", rows)
+    main.bump_cache_version(conn, "students")
+    conn.commit()
+    conn.close()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_store_after_invalidation_is_dropped():
+    cache = main.LoginCache()
+    generation = cache.generation
+    cache.remove_student("LC1")  # an admin write lands while the login reads the database
+    cache.store(generation, "LC1", "LCCLASS", "https://forms.example/lc")
+    assert "LC1" not in cache.students
+
+
+def test_deferred_cache_asks_the_database():
+    cache = main.LoginCache()
+    cache.set_student("LC2", "LCCLASS")
+    cache.set_active_link("LCCLASS", "https://forms.example/lc")
+    assert cache.lookup("LC2")
+    cache.defer_students()
+    assert cache.lookup("LC2") is None
+
+
+def test_filter_keeps_adds_made_during_a_rebuild():
+    bloom = main.StudentFilter()
+    conn = main.get_db_connection()
+
+    class AddDuringScan:
+        def execute(self, sql, params=()):
+            rows = conn.execute(sql, params).fetchall()
+            bloom.add("LCLATE")  # committed by another request while the scan runs
+            return rows
+
+    bloom.rebuild(AddDuringScan())
+    conn.close()
+    assert "LCLATE" in bloom.bloom
+
+
+def test_peer_bulk_write_reloads_once_and_logins_still_find_new_students(client, monkeypatch):
+    reloads = collections.Counter()
+    real_load = main.login_cache.load
+
+    def counting_load(conn, tables=("students", "active_links")):
+        if "students" in tables:
+            reloads[threading.current_thread().ident] += 1
+        real_load(conn, tables)
+
+    monkeypatch.setattr(main.login_cache, "load", counting_load)
+    batches = 30
+    for b in range(batches):
+        peer_insert([(f"Peer {b}-{i}", f"PEER{b:02d}{i:02d}", "PEERCLASS") for i in range(20)])
+        if b == 10:
+            # A poll has seen the writes: new students are found without a reload
+            assert main.resolve_student_login("PEER0501")[0]
+        time.sleep(0.01)
+
+    wait_until(lambda: "PEER2919" in main.login_cache.students and not main.student_filter.deferred)
+    assert main.login_cache.students["PEER2919"] == "PEERCLASS"
+    assert not main.student_filter.rejects("PEER2919")
+    # Without the debounce every poll during the writes reloaded students
+    assert reloads and max(reloads.values()) <= 2, reloads
+
+
+def test_external_insert_is_found_after_a_version_bump(client):
+    conn = main.open_db_connection()
+    conn.execute("INSERT INTO students (name, admission_number, class_name) VALUES ('Shell', 'EXT1', 'EXTCLASS')")
+    conn.commit()
+    time.sleep(0.2)  # a few polls: data_version moved but no version did
+    assert main.resolve_student_login("EXT1") == (False, None)
+
+    conn.execute("UPDATE cache_versions SET version = version + 1 WHERE name = 'students'")
+    conn.commit()
+    conn.close()
+    wait_until(lambda: main.resolve_student_login("EXT1")[0])
+
+
+def test_numeric_admission_number_in_json_login(client):
+    client.post("/admin/add_student", data={"name": "Numeric", "admission_number": "24680", "class_name": "NUMCLASS"})
+    client.post("/admin/upload_link", data={"name": "Num", "link": "https://forms.example/num", "class_name": "NUMCLASS"})
+    conn = main.get_db_connection()
+    link_id = conn.execute("SELECT id FROM links WHERE class_name = 'NUMCLASS'").fetchone()[0]
+    conn.close()
+    client.post("/admin/set_active_link", data={"link_id": str(link_id), "class_name": "NUMCLASS"})
+    for _ in range(2):  # a database lookup, then a cache hit
+        response = client.post("/student_login", json={"admission_number": 24680})
+        assert response.status_code == 200, response.text
+        assert response.json() == {"form_link": "https://forms.example/num"}
+
+
+def test_logins_and_cache_sync_survive_an_app_restart():
+    from fastapi.testclient import TestClient
+
+    for _ in range(2):
+        with TestClient(main.app) as client:
+            # An unknown-but-plausible number misses the cache and goes to the login pool
+            main.student_filter.add("RESTART404")
+            response = client.post("/student_login", json={"admission_number": "RESTART404"})
+            assert response.status_code == 401, response.text
+    assert sum(t.name == "cache-sync" for t in threading.enumerate()) == 1
@@ -0,0 +1,28 @@
+import main
+
+
+class RecordingConnection:
+    def __init__(self, conn):
+        self.conn, self.statements = conn, []
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, params))
+        return self.conn.execute(sql, params)
+
+
+def test_admission_prefix_search_with_class_uses_unique_index(client):
+    conn = RecordingConnection(main.get_db_connection())
+    assert main.search_students(conn, "ADMX", 5, class_name="SEARCH1") == []
+    sql, params = next((s, p) for s, p in conn.statements if "admission_number >= ?" in s)
+    plan = [r["detail"] for r in conn.conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    conn.conn.close()
+    assert any("sqlite_autoindex_students_1" in d for d in plan), plan
+    assert not any("TEMP B-TREE" in d for d in plan), plan
+
+
+def test_search_filters_by_class(client):
+    for i, class_name in enumerate(("SEARCH1", "SEARCH2")):
+        client.post("/admin/add_student", data={"name": f"Findme {i}", "admission_number": f"SRCH{i}",
+                                                "class_name": class_name})
+    results = client.get("/admin/search", params={"q": "SRCH", "class_name": "SEARCH2"}).json()["results"]
+    assert [r["admission_number"] for r in results] == ["SRCH1"]
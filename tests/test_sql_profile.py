@@ -0,0 +1,36 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def explain():
+    conn = main.get_db_connection()
+    profiler = main.SqlProfiler(None)
+
+    def flags(sql, params=()):
+        plan, flags = profiler.explain(conn, sql, params)
+        assert not plan[0].startswith("EXPLAIN failed"), plan
+        return flags
+
+    yield flags
+    conn.close()
+
+
+def test_keyset_first_page_is_not_flagged(explain):
+    assert explain("SELECT * FROM students ORDER BY id ASC LIMIT ?", (20,)) == []
+
+
+@pytest.mark.parametrize("sql, params", [
+    ("SELECT * FROM students ORDER BY id ASC LIMIT ? OFFSET ?", (20, 100)),
+    ("SELECT * FROM students WHERE name = ? ORDER BY id LIMIT ?", ("x", 20)),
+    ("SELECT * FROM students ORDER BY name LIMIT ?", (20,)),
+    ("SELECT * FROM students", ()),
+])
+def test_other_scans_are_flagged(explain, sql, params):
+    assert "full scan of students" in explain(sql, params)
+
+
+def test_small_tables_are_not_flagged(explain):
+    assert explain("SELECT name FROM sqlite_master WHERE type = 'table'") == []
+    assert explain("SELECT name, version FROM cache_versions") == []
@@ -0,0 +1,42 @@
+import io
+
+import pytest
+
+import main
+
+
+def roster(*rows):
+    return "".join(f"{name},{number},{class_name}\n" for name, number, class_name in rows).encode()
+
+
+def students():
+    conn = main.get_db_connection()
+    rows = conn.execute("SELECT name, admission_number, class_name FROM students ORDER BY admission_number").fetchall()
+    conn.close()
+    return [tuple(r) for r in rows]
+
+
+def test_failed_sync_applies_nothing_and_a_rerun_completes(client, monkeypatch):
+    main.sync_students_csv(io.BytesIO(roster(("Old", "SY1", "SYNC1"), ("Gone", "SY2", "SYNC1"))))
+    before = students()
+    target = [("Ann", "SY1", "SYNC2")] + [(f"New {i}", f"SY{i}", "SYNC1") for i in range(3, 9)]
+
+    def failing_checkpoint(conn, job, progress, total=None, **state):
+        raise RuntimeError("worker died before the commit")
+
+    monkeypatch.setattr(main, "checkpoint", failing_checkpoint)
+    with pytest.raises(RuntimeError):
+        main.sync_students_csv(io.BytesIO(roster(*target)), batch_size=2)
+    monkeypatch.undo()
+    assert students() == before
+
+    report = main.sync_students_csv(io.BytesIO(roster(*target)), batch_size=2)
+    assert students() == sorted(target, key=lambda r: r[1])
+    assert report["added"] == 6 and report["removed"] == 1 and report["changed"] == 1
+
+
+def test_dry_run_writes_nothing(client):
+    main.sync_students_csv(io.BytesIO(roster(("Dry", "SZ1", "SYNC3"))))
+    report = main.sync_students_csv(io.BytesIO(roster(("Dry", "SZ1", "SYNC4"), ("Wet", "SZ2", "SYNC3"))), dry_run=True)
+    assert (report["added"], report["changed"]) == (1, 1)
+    assert students() == [("Dry", "SZ1", "SYNC3")]